@@ -24,14 +24,15 @@ from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
 
-from backend.ml.data_loader import get_last_data_date, load_processed_data
+from backend.ml.data_loader import get_last_data_date, load_state_data
+from backend.ml.risk.shared_analysis import severity_levels
 
 
 def load_demographic_data(state: str) -> pd.DataFrame:
     """Load and filter processed CSV for demographic analysis."""
-    # Load data from database (zero file dependency)
+    # Load this state's rows from the cached DB frame (zero file dependency)
     try:
-        df = load_processed_data(validate=False)
+        state_df = load_state_data(state)
     except Exception as e:
         # Return empty DF on error so we handle it gracefully upstream
         return pd.DataFrame(columns=[
@@ -39,12 +40,6 @@ def load_demographic_data(state: str) -> pd.DataFrame:
             "total_enrolments", "total_demo_updates", "total_bio_updates"
         ])
 
-    if df.empty:
-        return df
-        
-    # Filter by state
-    state_df = df[df['state'].str.lower() == state.lower()].copy()
-    
     return state_df
 
 
@@ -65,8 +60,12 @@ def get_trend_direction(district_df: pd.DataFrame) -> str:
         if len(monthly) < 3:
             return "stable"
         
-        x = np.arange(len(monthly))
-        slope = np.polyfit(x, monthly.values, 1)[0]
+        # Closed-form OLS slope, cov(x, y) / var(x) with x = 0..n-1
+        # (polyfit builds a Vandermonde matrix and runs lstsq for the same number)
+        y = monthly.to_numpy(dtype=float)
+        n = y.size
+        x = np.arange(n) - (n - 1) / 2.0
+        slope = (x @ (y - y.mean())) / (n * (n * n - 1) / 12.0)
         
         if slope > monthly.mean() * 0.05:
             return "improving"
@@ -78,6 +77,39 @@ def get_trend_direction(district_df: pd.DataFrame) -> str:
         return "stable"
 
 
+def district_trend_directions(monthly: pd.Series) -> pd.Series:
+    """
+    get_trend_direction for every district at once.
+    
+    `monthly` is bio updates indexed by (district, month), sorted. Slopes use
+    the same closed-form OLS as get_trend_direction, summed per district.
+    """
+    by_district = monthly.groupby(level='district', sort=False)
+    n = by_district.transform('size').to_numpy(dtype=float)
+    y = monthly.to_numpy(dtype=float)
+    x = by_district.cumcount().to_numpy(dtype=float) - (n - 1) / 2.0
+    y_centered = y - by_district.transform('mean').to_numpy(dtype=float)
+    
+    counts = by_district.size()
+    means = by_district.mean()
+    cov = pd.Series(x * y_centered, index=monthly.index).groupby(level='district', sort=False).sum()
+    slopes = cov / (counts * (counts * counts - 1) / 12.0)
+    
+    threshold = means * 0.05
+    directions = np.where(slopes > threshold, "improving",
+                          np.where(slopes < -threshold, "declining", "stable"))
+    directions = np.where(counts < 3, "stable", directions)
+    return pd.Series(directions, index=counts.index)
+
+
+def _trend_points(monthly_bio: pd.Series, last: int = 12) -> List[Dict]:
+    """Sparkline points for the last `last` months, formatted in one vectorized strftime."""
+    tail = monthly_bio.iloc[-last:]
+    months = pd.DatetimeIndex(tail.index).strftime('%Y-%m').tolist()
+    values = tail.astype(int).tolist()
+    return [{"month": m, "value": v} for m, v in zip(months, values)]
+
+
 def calculate_deviation_from_state(district_bio: float, state_avg: float) -> float:
     """Calculate percentage deviation from state average."""
     if state_avg == 0:
@@ -180,16 +212,7 @@ def _statistical_fallback_analysis(state: str, state_df: pd.DataFrame) -> Dict:
         severity = classify_severity(risk_score)
         
         # Build trend data
-        monthly_sorted = monthly_bio.sort_index()
-        trend_data = []
-        for month, value in monthly_sorted.items():
-            try:
-                trend_data.append({
-                    "month": month.strftime('%Y-%m') if hasattr(month, 'strftime') else str(month)[:7],
-                    "value": int(value)
-                })
-            except:
-                pass
+        trend_data = _trend_points(monthly_bio.sort_index())
         
         segment = {
             "demographic_group": district,
@@ -197,7 +220,7 @@ def _statistical_fallback_analysis(state: str, state_df: pd.DataFrame) -> Dict:
             "enrolment_trend": trend,
             "deviation_from_state_avg": round(deviation, 1),
             "severity_level": severity,
-            "trend_data": trend_data[-12:],
+            "trend_data": trend_data,
             "recommendations": generate_recommendations({
                 'severity_level': severity,
                 'enrolment_trend': trend
@@ -264,47 +287,41 @@ def analyze_demographic_risks(state: str, window_days: int = 90) -> Dict:
     try:
         # Try ML model predictions
         from backend.ml.risk.demographic_risk_model import predict_demographic_risks
-        predictions_df = predict_demographic_risks(state, auto_train=True)
+        predictions_df = predict_demographic_risks(state, df=state_df, auto_train=True)
         
         # Calculate state average for deviation calculation
         state_avg_bio = state_df.groupby('month')['total_bio_updates'].sum().mean()
         
+        # Per-district monthly bio totals for the whole state in one groupby,
+        # then trend / average / deviation for every district as arrays
+        monthly = state_df.groupby(['district', 'month'])['total_bio_updates'].sum()
+        by_district = monthly.groupby(level='district', sort=False)
+        district_avg_bio = by_district.mean()
+        district_total_bio = by_district.sum()
+        trends = district_trend_directions(monthly)
+        if state_avg_bio == 0:
+            deviations = pd.Series(0.0, index=district_avg_bio.index)
+        else:
+            deviations = ((district_avg_bio - state_avg_bio) / state_avg_bio * 100).round(1)
+        
         # Build segments from ML predictions
         segments = []
         
-        for _, row in predictions_df.iterrows():
-            district = row['district']
-            risk_score = round(row['risk_score'], 2)
-            
-            # Get district data for additional metrics
-            district_df = state_df[state_df['district'] == district]
-            
-            # Get trend direction
-            trend = get_trend_direction(district_df)
-            
-            # Get deviation from state average
-            district_avg_bio = district_df.groupby('month')['total_bio_updates'].sum().mean()
-            deviation = calculate_deviation_from_state(district_avg_bio, state_avg_bio)
+        # Rounded scores + severity labels for every district in one pass
+        risk_scores = predictions_df['risk_score'].astype(float).round(2).to_numpy()
+        severities = severity_levels(risk_scores)
+        
+        for district, risk_score, severity in zip(predictions_df['district'], risk_scores.tolist(), severities.tolist()):
+            # Skip districts with no biometric data (all zeros) before building anything
+            if int(district_total_bio.get(district, 0)) == 0:
+                continue
             
-            # Classify severity
-            severity = classify_severity(risk_score)
+            # Get trend direction / deviation from state average
+            trend = trends.get(district, "stable")
+            deviation = float(deviations.get(district, 0.0))
             
             # Get trend data for sparkline
-            monthly_bio = district_df.groupby('month')['total_bio_updates'].sum().sort_index()
-            trend_data = []
-            for month, value in monthly_bio.items():
-                try:
-                    trend_data.append({
-                        "month": month.strftime('%Y-%m') if hasattr(month, 'strftime') else str(month)[:7],
-                        "value": int(value)
-                    })
-                except:
-                    pass
-            
-            # Skip districts with no biometric data (all zeros)
-            total_bio_updates = sum(d['value'] for d in trend_data)
-            if total_bio_updates == 0:
-                continue  # Skip this district
+            trend_data = _trend_points(monthly.loc[district])
             
             segment = {
                 "demographic_group": district,
@@ -312,7 +329,7 @@ def analyze_demographic_risks(state: str, window_days: int = 90) -> Dict:
                 "enrolment_trend": trend,
                 "deviation_from_state_avg": deviation,
                 "severity_level": severity,
-                "trend_data": trend_data[-12:],  # Last 12 months
+                "trend_data": trend_data,  # Last 12 months
                 "recommendations": generate_recommendations({
                     'severity_level': severity,
                     'enrolment_trend': trend
@@ -331,9 +348,9 @@ def analyze_demographic_risks(state: str, window_days: int = 90) -> Dict:
         highest_risk = segments[0] if segments else None
         
         # Load model metadata
-        from backend.ml.risk.demographic_risk_model import load_demographic_risk_model
+        from backend.ml.risk.demographic_risk_model import get_demographic_model_metadata
         try:
-            _, _, model_metadata = load_demographic_risk_model(state)
+            model_metadata = get_demographic_model_metadata(state)
         except:
             model_metadata = {
                 "demographic_model_name": "IsolationForest_BiometricEngagement",
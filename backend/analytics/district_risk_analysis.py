@@ -8,8 +8,9 @@ import numpy as np
 from typing import Dict, List, Optional
 from datetime import datetime
 
-from backend.ml.data_loader import load_processed_data, list_districts, get_last_data_date
+from backend.ml.data_loader import load_state_data, list_districts, get_last_data_date
 from backend.ml.risk.district_scoring import compute_district_risk
+from backend.ml.risk.shared_analysis import percentile_risk_scores, severity_levels, expand_trend_values
 from backend.common.state_resolver import resolve_state
 
 
@@ -32,9 +33,9 @@ def analyze_district_risks(state: str, window_days: int = 30, top: int = 20) ->
     # Convert window_days to months for monthly data
     window_months = max(1, window_days // 30)
     
-    # Load monthly CSV data
+    # Load this state's rows (precomputed row index, case-insensitive)
     try:
-        df = load_processed_data(validate=False)
+        df = load_state_data(state)
     except FileNotFoundError as e:
         return {
             "status": "error",
@@ -48,9 +49,6 @@ def analyze_district_risks(state: str, window_days: int = 30, top: int = 20) ->
             "districts": []
         }
     
-    # Filter by state (case-insensitive to handle CSV vs database name differences)
-    df = df[df['state'].str.lower() == state.lower()]
-    
     if df.empty:
         return {
             "status": "success",
@@ -67,71 +65,47 @@ def analyze_district_risks(state: str, window_days: int = 30, top: int = 20) ->
             }
         }
     
-    # Get unique districts for this state
-    districts_list = df['district'].unique().tolist()
-    
     # Compute ML risk for each district
     districts_results = []
     
-    # Pre-load baseline model once (optimization)
-    from backend.ml.registry import load_model
-    from backend.common.key_utils import slugify_key
-    
-    state_key = slugify_key(state)
-    baseline = load_model(f"baseline_expected_{state_key}")
-    if baseline is None:
-        baseline = load_model(f"baseline_expected_{state}")
-    if baseline is None:
-        baseline = load_model("baseline_expected_global")
-    
-    for district in districts_list:
-        # Get district data from already-loaded CSV
-        district_df = df[df['district'] == district].copy()
-        
-        if len(district_df) < 3:
-            # Skip districts with insufficient data
-            continue
-        
-        # Calculate risk components directly from district data
-        try:
-            # Sort by month
-            district_df = district_df.sort_values('month')
-            
-            # Simple risk calculation based on enrollment variance
-            enrollments = district_df['total_enrolments'].values
-            
-            # Calculate gap metrics
-            mean_enrollment = enrollments.mean()
-            std_enrollment = enrollments.std()
-            
-            # Gap from mean
-            gap_abs_mean = std_enrollment if std_enrollment > 0 else 0
-            
-            # Negative gap ratio (months below mean)
-            negative_gap_ratio = (enrollments < mean_enrollment).mean()
-            
-            # Trend (simple linear)
-            if len(enrollments) >= 2:
-                gap_trend = (enrollments[-1] - enrollments[0]) / len(enrollments)
-            else:
-                gap_trend = 0
-            
-            # Calculate raw risk score
-            import numpy as np
-            raw_risk = np.log1p(gap_abs_mean) + (negative_gap_ratio * 5) + (abs(gap_trend) / 1000)
-            
-        except Exception as e:
-            # Skip on error
-            continue
-        
+    # Risk components for all districts in one groupby pass (load_state_data
+    # rows are already sorted by district, month - no per-request sort)
+    enrolments = df['total_enrolments']
+    g = enrolments.groupby(df['district'], sort=False)
+    
+    counts = g.size()
+    mean_enrollment = g.mean()
+    
+    stats = pd.DataFrame({
+        "count": counts,
+        # Gap from mean (population std, same as ndarray.std())
+        "gap_abs_mean": g.std(ddof=0).fillna(0),
+        # Negative gap ratio (months below the district mean)
+        "negative_gap_ratio": (enrolments < df['district'].map(mean_enrollment))
+                              .groupby(df['district'], sort=False).mean(),
+        # Trend (simple linear)
+        "gap_trend": (g.last() - g.first()) / counts,
+    })
+    
+    # Skip districts with insufficient data
+    stats = stats[stats["count"] >= 3].assign(
+        raw_risk=lambda t: np.log1p(t["gap_abs_mean"])
+                           + t["negative_gap_ratio"] * 5
+                           + t["gap_trend"].abs() / 1000
+    )
+    
+    # Monthly series per district, kept for trend_data / totals below
+    district_values = {district: s.to_numpy() for district, s in g if district in stats.index}
+    
+    for district, row in zip(stats.index, stats.itertuples(index=False)):
         # Store for later normalization
         districts_results.append({
             "district": district,
-            "raw_risk": float(raw_risk),
-            "gap_abs_mean": float(gap_abs_mean),
-            "negative_gap_ratio": float(negative_gap_ratio),
-            "gap_trend": float(gap_trend),
-            "district_df": district_df
+            "raw_risk": float(row.raw_risk),
+            "gap_abs_mean": float(row.gap_abs_mean),
+            "negative_gap_ratio": float(row.negative_gap_ratio),
+            "gap_trend": float(row.gap_trend),
+            "values": district_values[district]
         })
 
     
@@ -153,78 +127,32 @@ def analyze_district_risks(state: str, window_days: int = 30, top: int = 20) ->
     
     
     # Normalize risk scores to 0-10 scale using percentile-based approach
-    raw_risks = [d["raw_risk"] for d in districts_results]
+    raw_risks_array = np.fromiter((d["raw_risk"] for d in districts_results),
+                                  dtype=float, count=len(districts_results))
     
-    # Use percentile-based normalization for better distribution
-    import numpy as np
-    raw_risks_array = np.array(raw_risks)
+    # Map percentile buckets to risk scores (1-10 scale), branch-free
+    risk_scores = percentile_risk_scores(raw_risks_array)
     
-    # Calculate percentiles
-    p25 = np.percentile(raw_risks_array, 25)
-    p50 = np.percentile(raw_risks_array, 50)
-    p75 = np.percentile(raw_risks_array, 75)
-    p90 = np.percentile(raw_risks_array, 90)
+    # Determine severity level based on normalized risk score
+    severities = severity_levels(risk_scores)
     
     # Process each district with normalized scores
     final_districts = []
     
-    for d in districts_results:
-        raw_risk = d["raw_risk"]
-        
-        # Map percentiles to risk scores (1-10 scale)
-        if raw_risk <= p25:
-            # Bottom 25% -> Low risk (1-3)
-            risk_score = 1.0 + (raw_risk / p25) * 2.0 if p25 > 0 else 2.0
-        elif raw_risk <= p50:
-            # 25-50% -> Low-Moderate (3-5)
-            risk_score = 3.0 + ((raw_risk - p25) / (p50 - p25)) * 2.0 if p50 > p25 else 4.0
-        elif raw_risk <= p75:
-            # 50-75% -> Moderate (5-7)
-            risk_score = 5.0 + ((raw_risk - p50) / (p75 - p50)) * 2.0 if p75 > p50 else 6.0
-        elif raw_risk <= p90:
-            # 75-90% -> Severe (7-9)
-            risk_score = 7.0 + ((raw_risk - p75) / (p90 - p75)) * 2.0 if p90 > p75 else 8.0
-        else:
-            # Top 10% -> Critical (9-10)
-            risk_score = 9.0 + min(1.0, (raw_risk - p90) / (max(raw_risks) - p90)) if max(raw_risks) > p90 else 9.5
-
-        
-        # Determine severity level based on normalized risk score
-        if risk_score >= 7.0:
-            severity_level = "Severe"
-        elif risk_score >= 4.0:
-            severity_level = "Moderate"
-        else:
-            severity_level = "Low"
-        
+    for d, risk_score, severity_level in zip(districts_results, risk_scores.tolist(), severities.tolist()):
         # Get real trend data from CSV (use ALL available months for better trend visualization)
-        district_df = d["district_df"]
+        values = d["values"]
         
         # Calculate actual monthly enrollment trend using ALL available data
-        if len(district_df) >= 2:
-            # Use all available months (not just window_months)
-            trend_data = district_df['total_enrolments'].tolist()
-            
-            # If we have more than 30 data points, take the last 30
-            if len(trend_data) > 30:
-                trend_data = trend_data[-30:]
-            # If we have fewer than 30, pad by repeating values to fill 30 days
-            elif len(trend_data) < 30:
-                # Repeat each month's value proportionally to fill 30 days
-                days_per_month = 30 // len(trend_data)
-                remainder = 30 % len(trend_data)
-                daily_trend = []
-                for i, monthly_val in enumerate(trend_data):
-                    # Add extra day to first 'remainder' months to reach exactly 30
-                    days_for_this_month = days_per_month + (1 if i < remainder else 0)
-                    daily_trend.extend([monthly_val] * days_for_this_month)
-                trend_data = daily_trend[:30]  # Ensure exactly 30 values
+        # (not just window_months), as exactly 30 daily points
+        if len(values) >= 2:
+            trend_data = expand_trend_values(values)
         else:
-            trend_data = [0] * 30
+            trend_data = np.zeros(30)
 
         
         # Get total enrollment from CSV
-        total_enrolment = int(district_df['total_enrolments'].sum())
+        total_enrolment = int(values.sum())
         
         # Generate recommendations based on ML severity
         recommendations = generate_recommendations(severity_level, d["district"], d["gap_abs_mean"], d["negative_gap_ratio"])
@@ -235,7 +163,7 @@ def analyze_district_risks(state: str, window_days: int = 30, top: int = 20) ->
             "gap_abs_mean": round(d["gap_abs_mean"], 2),
             "negative_gap_ratio": round(d["negative_gap_ratio"] * 100, 1),  # as percentage
             "severity_level": severity_level,
-            "trend_data": [round(float(x), 2) for x in trend_data],
+            "trend_data": np.round(trend_data.astype(float), 2).tolist(),
             "recommendations": recommendations,
             "total_enrolment": total_enrolment,
             # ML model metadata
@@ -243,7 +171,7 @@ def analyze_district_risks(state: str, window_days: int = 30, top: int = 20) ->
                 "raw_risk": round(d["raw_risk"], 4),
                 "gap_trend": round(d["gap_trend"], 4),
                 "model_used": "baseline_expected_model",
-                "data_points": len(district_df)
+                "data_points": len(values)
             }
         })
     
@@ -280,7 +208,7 @@ def analyze_district_risks(state: str, window_days: int = 30, top: int = 20) ->
             "data_lineage": "CSV → Feature Engineering → ML Model → Risk Score",
             "timestamp": datetime.now().isoformat(),
             "window_months": window_months,
-            "total_districts_analyzed": len(districts_list),
+            "total_districts_analyzed": len(counts),
             "districts_with_sufficient_data": len(districts_results),
             "last_data_date": get_last_data_date()
         }
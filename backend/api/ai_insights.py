@@ -87,10 +87,10 @@ def get_district_insights(state: str):
 @router.get("/insights/biometric-hotspots")
 def get_biometric_insights(state: str):
     """Generate AI insights for biometric hotspots."""
-    from backend.api.ml import biometric_hotspots
+    from backend.api.ml import biometric_hotspots_data
     
     state = resolve_state(state)
-    data = biometric_hotspots(state)
+    data = biometric_hotspots_data(state)
     
     if data.get("status") != "success":
         return {"status": "error", "message": "Failed to generate insights"}
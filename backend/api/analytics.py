@@ -5,6 +5,7 @@ import pandas as pd
 import numpy as np
 
 from backend.common.state_resolver import resolve_state
+from backend.common.responses import ORJSONNumpyResponse
 from backend.analytics.trend_analysis import moving_average_trend
 from backend.analytics.state_summary import get_state_metric_summary
 from backend.analytics.district_comparison import top_districts_by_enrolment
@@ -71,7 +72,8 @@ def district_risks(state: str, window: int = 30, top: int = 20):
     """
     try:
         state = resolve_state(state)
-        return analyze_district_risks(state, window, top)
+        # D districts x 30-point trends: encode with orjson, bypassing jsonable_encoder
+        return ORJSONNumpyResponse(analyze_district_risks(state, window, top))
     except ValueError as e:
         logger.warning(f"Invalid state input for district-risks: {state}")
         return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
@@ -125,7 +127,7 @@ def get_dashboard_summary_cached(state: str):
     """
     Cached version of state summary calculation.
     """
-    from backend.ml.data_loader import load_processed_data
+    from backend.ml.data_loader import load_processed_data, filter_state
     from datetime import datetime
     
     # Frontend requests these 10 states (from Home.tsx lines 30-33)
@@ -134,9 +136,9 @@ def get_dashboard_summary_cached(state: str):
         "Tamil Nadu", "Rajasthan", "Karnataka", "Gujarat", "Andhra Pradesh"
     ]
     
-    # Load CSV data ONCE (with caching)
+    # Load CSV data ONCE (with caching; read-only, so no defensive copy)
     try:
-        df = load_processed_data(validate=False)
+        df = load_processed_data(validate=False, copy=False)
     except Exception as e:
         return {
             "status": "error",
@@ -152,7 +154,7 @@ def get_dashboard_summary_cached(state: str):
     all_state_data = {}
     
     for st in FRONTEND_STATES:
-        st_df = df[df['state'].str.lower() == st.lower()]
+        st_df = filter_state(df, st)
         if st_df.empty:
             continue
         
@@ -170,7 +172,7 @@ def get_dashboard_summary_cached(state: str):
     state_key = state.lower()
     if state_key not in all_state_data:
         # State not in pre-calculated list, calculate on demand
-        state_df = df[df['state'].str.lower() == state.lower()]
+        state_df = filter_state(df, state)
         if state_df.empty:
             return {
                 "status": "error",
@@ -241,22 +243,18 @@ def all_states_summary():
     from datetime import datetime
     
     try:
-        # Load CSV data ONCE
-        df = load_processed_data(validate=False)
+        # Load CSV data ONCE (read-only, so no defensive copy)
+        df = load_processed_data(validate=False, copy=False)
     except Exception as e:
         return JSONResponse(status_code=500, content={
             "status": "error",
             "message": f"Failed to load CSV data: {str(e)}"
         })
     
-    # Get all unique states from the CSV
-    all_states = df['state'].unique().tolist()
-    
-    # Calculate metrics for ALL states in parallel
+    # Calculate metrics for ALL states (one groupby partition instead of a filter per state)
     all_state_data = []
     
-    for state in all_states:
-        state_df = df[df['state'].str.lower() == state.lower()]
+    for state, state_df in df.groupby('state', sort=False, observed=True):
         if state_df.empty:
             continue
         
@@ -4,26 +4,129 @@ Returns summary for multiple states in one API call.
 """
 from fastapi import APIRouter
 from backend.common.state_resolver import resolve_state
-from backend.ml.data_loader import load_processed_data
+from backend.ml.data_loader import load_processed_data, data_version
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+import asyncio
+import logging
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Shared pool for per-state work (pandas releases the GIL in most of its C loops)
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="state-summary")
 
-@router.post("/state-summary-batch")
-def state_summary_batch(states: list[str]):
+
+@lru_cache(maxsize=2)
+def _state_groups(version) -> dict:
     """
-    Get summary for multiple states in one call (OPTIMIZED).
+    {lowercased state: rows} partitioned in one groupby pass.
+    Keyed on the data_loader cache version so a reload evicts it.
     """
+    df = load_processed_data(validate=False, copy=False)
+    if df.empty:
+        return {}
+    return {str(s).lower(): g for s, g in df.groupby('state', sort=False, observed=True)}
+
+
+def _empty_summary(state: str) -> dict:
+    return {
+        "state": state,
+        "risk_score": 0,
+        "anomaly_severity": "Low",
+        "negative_gap_ratio": "0%",
+        "forecast_growth": "+0.00",
+        "top_district": None
+    }
+
+
+def _state_summary(state: str, by_state: dict) -> dict:
+    """Summary metrics for one requested state (runs on _EXECUTOR)."""
     from backend.api.analytics import (_calculate_risk_from_csv, 
                                         _calculate_anomaly_from_csv,
                                         _calculate_negative_gap_ratio,
                                         _calculate_growth_from_csv)
+    try:
+        resolved_state = resolve_state(state)
+        state_df = by_state.get(resolved_state.lower())
+        
+        if state_df is None or state_df.empty:
+            return _empty_summary(state)
+        
+        # Calculate metrics
+        risk_score = _calculate_risk_from_csv(state_df)
+        anomaly_severity = _calculate_anomaly_from_csv(state_df)
+        negative_gap_ratio = _calculate_negative_gap_ratio(state_df)
+        forecast_growth = _calculate_growth_from_csv(state_df)
+        
+        # Get top district
+        try:
+            district_totals = state_df.groupby('district')['total_enrolments'].sum()
+            top_district = district_totals.idxmax() if len(district_totals) > 0 else None
+        except:
+            top_district = None
+        
+        return {
+            "state": resolved_state,
+            "risk_score": risk_score,
+            "anomaly_severity": anomaly_severity,
+            "negative_gap_ratio": negative_gap_ratio,
+            "forecast_growth": forecast_growth,
+            "top_district": top_district
+        }
+    except Exception as e:
+        logger.warning(f"⚠️ Error processing {state}: {e}")
+        return _empty_summary(state)
+
+
+@lru_cache(maxsize=2)
+def _top_priorities(version) -> tuple:
+    """
+    Top 5 (state, risk) pairs across all states. Depends only on the data,
+    so it is cached on the same version key as _state_groups. Errors
+    propagate, so a failed computation is not cached.
+    """
+    from backend.api.analytics import _calculate_risk_from_csv
+    priorities = []
+    
+    # Reuse the groupby partitions instead of re-filtering df per state
+    for st_df in _state_groups(version).values():
+        if not st_df.empty:
+            st_risk = _calculate_risk_from_csv(st_df)
+            priorities.append((st_df['state'].iat[0], round(st_risk, 2)))
     
-    # Load CSV ONCE for all states
+    return tuple(sorted(priorities, key=lambda x: x[1], reverse=True)[:5])
+
+
+def _top_priorities_or_empty(version) -> tuple:
     try:
-        df = load_processed_data(validate=False)
+        return _top_priorities(version)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to compute top priority states: {e}")
+        return ()
+
+
+def _load_state_groups():
+    # Refresh the loader cache if stale, then reuse its partitions
+    load_processed_data(validate=False, copy=False)
+    version = data_version()
+    return version, _state_groups(version)
+
+
+@router.post("/state-summary-batch")
+async def state_summary_batch(states: list[str]):
+    """
+    Get summary for multiple states in one call (OPTIMIZED).
+    States are independent, so they are summarised concurrently on a shared thread pool.
+    """
+    loop = asyncio.get_running_loop()
+    
+    # Load data ONCE for all states (read-only, served from the loader cache)
+    try:
+        version, by_state = await loop.run_in_executor(_EXECUTOR, _load_state_groups)
     except Exception as e:
         return {
             "status": "error",
@@ -31,73 +134,17 @@ def state_summary_batch(states: list[str]):
             "results": []
         }
     
-    results = []
+    # Dashboard polling often repeats states: summarise each distinct input once
+    unique_states = list(dict.fromkeys(states))
     
-    for state in states:
-        try:
-            resolved_state = resolve_state(state)
-            state_df = df[df['state'].str.lower() == resolved_state.lower()]
-            
-            if state_df.empty:
-                results.append({
-                    "state": state,
-                    "risk_score": 0,
-                    "anomaly_severity": "Low",
-                    "negative_gap_ratio": "0%",
-                    "forecast_growth": "+0.00",
-                    "top_district": None
-                })
-                continue
-            
-            # Calculate metrics
-            risk_score = _calculate_risk_from_csv(state_df)
-            anomaly_severity = _calculate_anomaly_from_csv(state_df)
-            negative_gap_ratio = _calculate_negative_gap_ratio(state_df)
-            forecast_growth = _calculate_growth_from_csv(state_df)
-            
-            # Get top district
-            try:
-                district_totals = state_df.groupby('district')['total_enrolments'].sum()
-                top_district = district_totals.idxmax() if len(district_totals) > 0 else None
-            except:
-                top_district = None
-            
-            results.append({
-                "state": resolved_state,
-                "risk_score": risk_score,
-                "anomaly_severity": anomaly_severity,
-                "negative_gap_ratio": negative_gap_ratio,
-                "forecast_growth": forecast_growth,
-                "top_district": top_district
-            })
-        except Exception as e:
-            print(f"Error processing {state}: {e}")
-            results.append({
-                "state": state,
-                "risk_score": 0,
-                "anomaly_severity": "Low",
-                "negative_gap_ratio": "0%",
-                "forecast_growth": "+0.00",
-                "top_district": None
-            })
-    
-    # Calculate priorities from all states
-    try:
-        all_states = df['state'].unique().tolist()
-        priorities = []
-        
-        for st in all_states:
-            st_df = df[df['state'].str.lower() == st.lower()]
-            if not st_df.empty:
-                st_risk = _calculate_risk_from_csv(st_df)
-                priorities.append({
-                    "name": st,
-                    "value": round(st_risk, 2)
-                })
-        
-        priorities = sorted(priorities, key=lambda x: x["value"], reverse=True)[:5]
-    except:
-        priorities = []
+    # Per-state summaries and the country-wide priorities all run concurrently
+    *summaries, priorities = await asyncio.gather(
+        *[loop.run_in_executor(_EXECUTOR, _state_summary, state, by_state) for state in unique_states],
+        loop.run_in_executor(_EXECUTOR, _top_priorities_or_empty, version),
+    )
+    summary_by_state = dict(zip(unique_states, summaries))
+    results = [summary_by_state[state] for state in states]
+    priorities = [{"name": name, "value": value} for name, value in priorities]
     
     return {
         "status": "success",
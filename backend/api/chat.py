@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from groq import Groq
+from groq import AsyncGroq
+import httpx
+import json
 import os
 from dotenv import load_dotenv
 
@@ -16,7 +19,30 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")  # Get from https://console.groq.co
 if not GROQ_API_KEY:
     print("WARNING: GROQ_API_KEY not set. Chatbot will not work until you add your API key.")
 
-client = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
+# HTTP/2 multiplexing needs the optional `h2` package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One pooled httpx client for the process: keep-alive connections are reused
+# across requests, so TCP/TLS setup is paid once. Closed on app shutdown.
+_HTTP = httpx.AsyncClient(
+    http2=HTTP2_AVAILABLE,
+    timeout=30.0,
+    limits=httpx.Limits(max_connections=128, max_keepalive_connections=64),
+) if GROQ_API_KEY else None
+
+# Async client (singleton) so the event loop keeps serving other requests during
+# the LLM round-trip
+client = AsyncGroq(api_key=GROQ_API_KEY, http_client=_HTTP) if GROQ_API_KEY else None
+
+
+async def close_http_client():
+    """Release pooled connections (called from the app's shutdown event)."""
+    if _HTTP is not None:
+        await _HTTP.aclose()
 
 # System context about the UIDAI platform
 SYSTEM_CONTEXT = """You are an AI assistant for the UIDAI Trends Platform - a government analytics dashboard for Aadhaar enrollment monitoring in India.
@@ -98,7 +124,53 @@ User Assistance Guidelines:
 - Answer questions about specific states/districts
 - Explain color coding (Red=Critical, Amber=Warning, Green=Good)
 
-Keep responses concise, friendly, and actionable. Focus on helping users make data-driven decisions for improving Aadhaar enrollment."""
+Keep responses concise, friendly, and actionable. Focus on helping users make data-driven decisions for improving Aadhaar enrollment.""".strip()
+
+# Built once: the system block is byte-identical and always first in `messages`,
+# which is what provider-side prefix caching keys on.
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_CONTEXT}
+
+
+# History sent to the model is trimmed newest-first to a token budget (not a
+# fixed message count) so cost/latency don't swing with message length.
+HISTORY_TOKEN_BUDGET = 2000
+
+try:
+    import tiktoken
+    _ENCODER = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODER = None  # fall back to ~4 chars per token
+
+
+def _count_tokens(text: str) -> int:
+    if _ENCODER is not None:
+        return len(_ENCODER.encode(text))
+    return len(text) // 4 + 1
+
+
+def _trim_history(history: list, budget: int = HISTORY_TOKEN_BUDGET) -> list:
+    """Most recent history messages whose combined content fits in `budget` tokens."""
+    if not history:
+        return []
+    kept = []
+    used = 0
+    for msg in reversed(history):
+        content = msg.get("content", "") if isinstance(msg, dict) else msg
+        used += _count_tokens(str(content))
+        if used > budget:
+            break
+        kept.append(msg)
+    kept.reverse()
+    return kept
+
+
+# Shared by /chat and /chat/stream
+COMPLETION_PARAMS = {
+    "model": "llama-3.1-8b-instant",  # Most stable Groq model
+    "temperature": 0.7,
+    "max_tokens": 500,
+    "top_p": 0.9,
+}
 
 
 class ChatRequest(BaseModel):
@@ -112,6 +184,15 @@ class ChatResponse(BaseModel):
     error: str = None
 
 
+def _build_messages(request: ChatRequest) -> list:
+    # System context, recent history (token-budgeted), then the current user message
+    return [
+        SYSTEM_MESSAGE,
+        *_trim_history(request.history),
+        {"role": "user", "content": request.message},
+    ]
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
@@ -127,32 +208,11 @@ async def chat(request: ChatRequest):
         )
     
     try:
-        # Prepare conversation with system context
-        messages = [
-            {
-                "role": "system",
-                "content": SYSTEM_CONTEXT
-            }
-        ]
-        
-        # Add conversation history if provided
-        for msg in request.history[-10:]:  # Keep last 10 messages for context
-            messages.append(msg)
-        
-        # Add current user message
-        messages.append({
-            "role": "user",
-            "content": request.message
-        })
-        
         # Call Groq API with LLaMA 3.1 8B Instant (most reliable free model)
-        chat_completion = client.chat.completions.create(
-            messages=messages,
-            model="llama-3.1-8b-instant",  # Most stable Groq model
-            temperature=0.7,
-            max_tokens=500,
-            top_p=0.9,
-            stream=False
+        chat_completion = await client.chat.completions.create(
+            messages=_build_messages(request),
+            stream=False,
+            **COMPLETION_PARAMS
         )
         
         # Extract response
@@ -171,6 +231,43 @@ async def chat(request: ChatRequest):
         )
 
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Same as /chat, but streams the answer as Server-Sent Events while it is
+    generated: `data: {"delta": "..."}` chunks, then `data: [DONE]`.
+    Failures are sent as a final `data: {"error": "..."}` event.
+    """
+    if not client:
+        raise HTTPException(
+            status_code=500,
+            detail="Chatbot not configured. Please set GROQ_API_KEY environment variable."
+        )
+    
+    async def event_stream():
+        try:
+            stream = await client.chat.completions.create(
+                messages=_build_messages(request),
+                stream=True,
+                **COMPLETION_PARAMS
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield f"data: {json.dumps({'delta': delta})}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            return
+        
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/chat/health")
 async def chat_health():
     """Check if chatbot is configured and ready."""
@@ -14,6 +14,7 @@ from backend.ml.risk.recommend import recommend_actions
 from backend.ml.risk.district_scoring import compute_district_risk
 
 from backend.ml.risk.biometric_district_scoring import compute_biometric_district_risk
+from backend.ml.risk.shared_analysis import percentile_risk_scores, severity_levels
 
 router = APIRouter()
 
@@ -114,15 +115,15 @@ def biometric_hotspots(state: str, top: int = 20):
     Get biometric risk hotspots for a state with ML-powered analysis.
     Returns data matching frontend BiometricHotspots.tsx schema.
     """
-    from backend.ml.data_loader import load_processed_data
+    from backend.ml.data_loader import load_state_data
     from datetime import datetime
     import numpy as np
     
     state = resolve_state(state)
     
-    # Load CSV data
+    # Load this state's rows (precomputed per-state row index, no full-frame filter)
     try:
-        df = load_processed_data(validate=False)
+        df = load_state_data(state)
     except FileNotFoundError:
         return {
             "status": "error",
@@ -134,9 +135,6 @@ def biometric_hotspots(state: str, top: int = 20):
             "trend": "Stable"
         }
     
-    # Filter by state (case-insensitive)
-    df = df[df['state'].str.lower() == state.lower()]
-    
     if df.empty:
         return {
             "status": "success",
@@ -177,40 +175,15 @@ def biometric_hotspots(state: str, top: int = 20):
             }
         }
     
-    # Normalize risk scores using percentile-based approach
-    raw_risks = [r["raw_risk"] for r in results]
-    raw_risks_array = np.array(raw_risks)
-    
-    p25 = np.percentile(raw_risks_array, 25)
-    p50 = np.percentile(raw_risks_array, 50)
-    p75 = np.percentile(raw_risks_array, 75)
-    p90 = np.percentile(raw_risks_array, 90)
+    # Normalize risk scores using percentile-based approach, then severity,
+    # each as one vectorized pass over all districts
+    raw_risks_array = np.fromiter((r["raw_risk"] for r in results), dtype=float, count=len(results))
+    scores = percentile_risk_scores(raw_risks_array)
+    severities = severity_levels(scores)
     
     # Process each district with normalized scores
     hotspots = []
-    for r in results:
-        raw_risk = r["raw_risk"]
-        
-        # Map percentiles to risk scores (1-10 scale)
-        if raw_risk <= p25:
-            score = 1.0 + (raw_risk / p25) * 2.0 if p25 > 0 else 2.0
-        elif raw_risk <= p50:
-            score = 3.0 + ((raw_risk - p25) / (p50 - p25)) * 2.0 if p50 > p25 else 4.0
-        elif raw_risk <= p75:
-            score = 5.0 + ((raw_risk - p50) / (p75 - p50)) * 2.0 if p75 > p50 else 6.0
-        elif raw_risk <= p90:
-            score = 7.0 + ((raw_risk - p75) / (p90 - p75)) * 2.0 if p90 > p75 else 8.0
-        else:
-            score = 9.0 + min(1.0, (raw_risk - p90) / (max(raw_risks) - p90)) if max(raw_risks) > p90 else 9.5
-        
-        # Determine severity
-        if score >= 7.0:
-            severity = "Severe"
-        elif score >= 4.0:
-            severity = "Moderate"
-        else:
-            severity = "Low"
-        
+    for r, score, severity in zip(results, scores.tolist(), severities.tolist()):
         hotspots.append({
             "district": r["district"],
             "score": round(score, 2),
@@ -234,13 +207,14 @@ def biometric_hotspots(state: str, top: int = 20):
     for h in hotspots:
         h["compare_to_avg"] = round(h["score"] - avg_risk_score, 2)
     
-    # Determine trend (compare recent vs older biometric data)
+    # Determine trend (compare recent vs older state-wide monthly totals)
     try:
-        # Get overall state biometric trend
-        state_df = df.sort_values('month')
-        if len(state_df) >= 6:
-            recent = state_df.tail(3)['total_bio_updates'].mean()
-            older = state_df.head(3)['total_bio_updates'].mean()
+        # One groupby over the state's rows instead of re-sorting them
+        monthly_totals = df.groupby('month', sort=True)['total_bio_updates'].sum().to_numpy()
+        window = min(3, len(monthly_totals) // 2)
+        if window >= 1:
+            recent = monthly_totals[-window:].mean()
+            older = monthly_totals[:window].mean()
             if recent > older * 1.05:
                 trend = "Improving"
             elif recent < older * 0.95:
@@ -58,10 +58,10 @@ def export_district_risks_csv(state: str, window: int = 30):
 @router.get("/csv/biometric-hotspots")
 def export_biometric_hotspots_csv(state: str):
     """Export biometric hotspots data as CSV."""
-    from backend.api.ml import biometric_hotspots
+    from backend.api.ml import biometric_hotspots_data
     
     state = resolve_state(state)
-    result = biometric_hotspots(state)
+    result = biometric_hotspots_data(state)
     
     if result.get("status") != "success" or not result.get("hotspots"):
         return Response(content="No data available", media_type="text/plain")
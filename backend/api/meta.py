@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from backend.common.state_resolver import get_all_canonical_states
+from backend.common.state_resolver import get_all_canonical_states, search_states
 
 router = APIRouter()
 
@@ -31,3 +31,25 @@ def get_states():
             "count": 0,
             "states": []
         }
+
+
+
+@router.get("/states/search")
+def search_state_names(q: str = ""):
+    """
+    Canonical state names starting with `q` (case-insensitive), for state
+    autocomplete.
+    
+    Returns:
+        {
+            "status": "success",
+            "count": int,
+            "states": [matching state names]
+        }
+    """
+    states = search_states(q)
+    return {
+        "status": "success",
+        "count": len(states),
+        "states": states
+    }
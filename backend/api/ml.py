@@ -1,26 +1,70 @@
 from fastapi import APIRouter
+from concurrent.futures import ThreadPoolExecutor
+from heapq import nlargest
+from operator import itemgetter
+import asyncio
+import threading
+import time
 
 from backend.ml.safe import safe_run
-from backend.common.state_resolver import resolve_state
+from backend.common.state_resolver import resolve_state, get_all_canonical_states
+from backend.common.responses import ORJSONNumpyResponse, stream_records_response
 
 from backend.ml.anomaly.train import train_baseline_model
-from backend.ml.anomaly.predict import predict_gap_and_anomalies
+from backend.ml.anomaly.predict import gap_anomaly_frame
 
 # Use Prophet-based trend forecast (not Ridge regression)
 from backend.ml.forecast.trend_forecast import train_trend_forecast_model, predict_trend_forecast
 
 from backend.ml.risk.scoring import compute_state_risk
 from backend.ml.risk.recommend import recommend_actions
-from backend.db.session import SessionLocal
-from backend.db.models import UIDAIRecord
 
 from backend.ml.biometric.train import train_biometric_baseline_model
-from backend.ml.biometric.predict import biometric_gap_anomaly, biometric_risk_score
+from backend.ml.biometric.predict import biometric_gap_anomaly_frame, biometric_risk_score
 
 
 
 router = APIRouter()
 
+# Bounded pool for /risk/top-states fan-out (8 at a time so we don't drain the DB pool)
+_RISK_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="state-risk")
+
+# Short-lived forecast memo shared by /forecast and /forecast/insights
+# (the frontend calls both back to back). (state, days) -> (stored_at, result).
+# Sync routes run on the threadpool, so every access holds _FORECAST_LOCK
+# (the forecast itself is computed outside it).
+_FORECAST_CACHE = {}
+_FORECAST_LOCK = threading.Lock()
+_FORECAST_TTL_SECONDS = 300
+_FORECAST_CACHE_SIZE = 256
+
+
+def _cached_forecast(state: str, days: int) -> dict:
+    key = (state, days)
+    with _FORECAST_LOCK:
+        hit = _FORECAST_CACHE.get(key)
+        if hit is not None and time.monotonic() - hit[0] < _FORECAST_TTL_SECONDS:
+            return hit[1]
+    
+    result = safe_run(predict_trend_forecast, state=state, days=days)
+    if result.get("status") == "success":
+        now = time.monotonic()
+        with _FORECAST_LOCK:
+            # Purge expired entries, then drop the oldest if still full
+            for k in [k for k, (stored_at, _) in _FORECAST_CACHE.items()
+                      if now - stored_at >= _FORECAST_TTL_SECONDS]:
+                del _FORECAST_CACHE[k]
+            if len(_FORECAST_CACHE) >= _FORECAST_CACHE_SIZE:
+                _FORECAST_CACHE.pop(min(_FORECAST_CACHE, key=lambda k: _FORECAST_CACHE[k][0]), None)
+            _FORECAST_CACHE[key] = (now, result)
+    return result
+
+
+def _invalidate_forecast(state: str) -> None:
+    with _FORECAST_LOCK:
+        for key in [k for k in _FORECAST_CACHE if k[0] == state]:
+            del _FORECAST_CACHE[key]
+
 
 @router.post("/train/baseline")
 def train_baseline(state: str):
@@ -28,20 +72,37 @@ def train_baseline(state: str):
     return safe_run(train_baseline_model, state=state)
 
 
+def _stream_anomaly_results(frame_fn, state: str):
+    """Error dicts as before; successful results streamed row batches at a time."""
+    out = safe_run(frame_fn, state=state)
+    if isinstance(out, dict):
+        return out
+    head = {"status": "success", "state": state, "data_source": "processed_monthly_csv"}
+    return stream_records_response(head, "results", out)
+
+
 @router.get("/anomaly/gap")
 def gap_anomaly(state: str):
     state = resolve_state(state)
-    return safe_run(predict_gap_and_anomalies, state=state)
+    return _stream_anomaly_results(gap_anomaly_frame, state)
 
 
 @router.post("/train/forecast")
 def train_forecast(state: str):
     state = resolve_state(state)
-    return safe_run(train_trend_forecast_model, state=state)
+    result = safe_run(train_trend_forecast_model, state=state)
+    # New model -> drop memoized forecasts for this state
+    _invalidate_forecast(state)
+    return result
 
 
 @router.get("/forecast")
 def get_forecast(state: str, days: int = 30):
+    """Trend direction analysis (see forecast_data), encoded with orjson."""
+    return ORJSONNumpyResponse(forecast_data(state, days))
+
+
+def forecast_data(state: str, days: int = 30) -> dict:
     """
     Get TREND DIRECTION ANALYSIS (not predictions).
     Uses trend-only Prophet model trained on actual enrollment data.
@@ -51,7 +112,7 @@ def get_forecast(state: str, days: int = 30):
     Limited 2025 data makes 2026 predictions unreliable.
     """
     state = resolve_state(state)
-    result = safe_run(predict_trend_forecast, state=state, days=days)
+    result = _cached_forecast(state, days)
     
     # Transform data format for frontend compatibility
     if result.get("status") == "success":
@@ -88,18 +149,18 @@ def risk_recommendations(state: str):
 
 
 @router.get("/risk/top-states")
-def top_states(top: int = 10):
-    session = SessionLocal()
-    states = [x[0] for x in session.query(UIDAIRecord.state).distinct().all()]
-    session.close()
-
-    scored = []
-    for st in states:
-        out = compute_state_risk(st)
-        if out.get("status") == "success":
-            scored.append(out)
-
-    scored = sorted(scored, key=lambda x: x["risk_score"], reverse=True)[:top]
+async def top_states(top: int = 10):
+    loop = asyncio.get_running_loop()
+    states = await loop.run_in_executor(_RISK_EXECUTOR, get_all_canonical_states)
+
+    # States are independent - score them concurrently off the event loop
+    results = await asyncio.gather(
+        *(loop.run_in_executor(_RISK_EXECUTOR, compute_state_risk, st) for st in states)
+    )
+    scored = [out for out in results if out.get("status") == "success"]
+
+    # Top-N selection only (no full sort of every state)
+    scored = nlargest(top, scored, key=itemgetter("risk_score"))
     return {"status": "success", "top": top, "results": scored}
 
 @router.post("/train/biometric-baseline")
@@ -111,7 +172,7 @@ def train_bio_baseline(state: str):
 @router.get("/biometric/anomaly")
 def bio_anomaly(state: str):
     state = resolve_state(state)
-    return safe_run(biometric_gap_anomaly, state=state)
+    return _stream_anomaly_results(biometric_gap_anomaly_frame, state)
 
 
 @router.get("/biometric/risk")
@@ -124,6 +185,11 @@ def bio_risk(state: str):
 
 @router.get("/historical/enrolment")
 def get_historical_enrolment(state: str, days: int = 30):
+    """Real monthly enrolment history (see historical_enrolment_data), encoded with orjson."""
+    return ORJSONNumpyResponse(historical_enrolment_data(state, days))
+
+
+def historical_enrolment_data(state: str, days: int = 30) -> dict:
     """
     Get REAL historical enrollment data from processed monthly CSV.
     
@@ -149,16 +215,16 @@ def get_historical_enrolment(state: str, days: int = 30):
         
         # Convert to DataFrame for easier manipulation
         df = pd.DataFrame(series)
-        df['month'] = pd.to_datetime(df['month'])
+        if not pd.api.types.is_datetime64_any_dtype(df['month']):
+            df['month'] = pd.to_datetime(df['month'])
         df = df.sort_values('month')
         
         # Return ONLY the actual months that exist in the CSV
-        historical = []
-        for _, row in df.iterrows():
-            historical.append({
-                "date": row['month'].strftime("%Y-%m-%d"),  # First day of month
-                "actual": int(row['total_enrolment'])
-            })
+        # (columns converted in one pass each, no per-row Series)
+        historical = pd.DataFrame({
+            "date": df['month'].dt.strftime("%Y-%m-%d"),  # First day of month
+            "actual": df['total_enrolment'].astype('int64'),
+        }).to_dict(orient='records')
         
         return {
             "status": "success",
@@ -184,7 +250,7 @@ def get_forecast_insights(state: str, days: int = 30):
     state = resolve_state(state)
     
     # Get the actual forecast data which includes model_metadata
-    forecast_result = safe_run(predict_trend_forecast, state=state, days=days)
+    forecast_result = _cached_forecast(state, days)
     
     if forecast_result.get("status") != "success":
         return {
@@ -245,20 +311,32 @@ def get_forecast_insights(state: str, days: int = 30):
 
 @router.get("/biometric/hotspots")
 def biometric_hotspots(state: str):
+    """
+    Biometric risk hotspots for a state (see biometric_hotspots_data).
+    D districts x 30-point trend arrays: encoded with orjson, bypassing
+    jsonable_encoder.
+    """
+    return ORJSONNumpyResponse(biometric_hotspots_data(state))
+
+
+def biometric_hotspots_data(state: str) -> dict:
     """
     Get biometric risk hotspots for a state with ML-powered analysis.
     Uses CSV data and trained biometric ML models (with statistical fallback).
+    
+    Plain dict (trend_data values are float64 arrays) for internal callers
+    such as the CSV export and AI insights.
     """
-    from backend.ml.data_loader import load_processed_data, get_last_data_date
+    from backend.ml.data_loader import load_state_data, get_last_data_date
     from datetime import datetime
     import numpy as np
     import pandas as pd
     
     state = resolve_state(state)
     
-    # Load CSV data ONCE
+    # Load this state's rows ONCE (precomputed row index, case-insensitive)
     try:
-        df = load_processed_data(validate=False)
+        df = load_state_data(state)
     except FileNotFoundError:
         return {
             "status": "error",
@@ -270,9 +348,6 @@ def biometric_hotspots(state: str):
             "trend": "Stable"
         }
     
-    # Filter by state (case-insensitive)
-    df = df[df['state'].str.lower() == state.lower()]
-    
     if df.empty:
         return {
             "status": "success",
@@ -288,70 +363,53 @@ def biometric_hotspots(state: str):
             }
         }
     
-    # Get unique districts
-    districts = df['district'].unique().tolist()
+    from backend.ml.risk.shared_analysis import segment_gap_stats, expand_trend_values
+    
+    # load_state_data rows are already sorted by (district, month), so each district
+    # is one contiguous segment: compute every district's gap metrics in a single
+    # compiled pass (instead of filtering df per district)
+    bio_values_all = df['total_bio_updates'].to_numpy(dtype=float)
+    counts = df.groupby('district', sort=False, observed=True).size()
+    offsets = np.concatenate(([0], np.cumsum(counts.to_numpy())))
+    
+    gap_abs_mean, negative_gap_ratio, gap_trend = segment_gap_stats(bio_values_all, offsets)
+    stats = pd.DataFrame({
+        "count": counts.to_numpy(),
+        # Gap from mean (population std)
+        "gap_abs_mean": gap_abs_mean,
+        # Negative gap ratio (months below mean)
+        "negative_gap_ratio": negative_gap_ratio,
+        # Trend (simple linear)
+        "gap_trend": gap_trend,
+        "start": offsets[:-1],
+    }, index=counts.index)
+    stats = stats[stats["count"] >= 3]
+    
+    # Calculate raw risk score (statistical formula)
+    raw_risk = (np.log1p(stats["gap_abs_mean"].to_numpy())
+                + stats["negative_gap_ratio"].to_numpy() * 10
+                + np.abs(stats["gap_trend"].to_numpy()) / 1000)
+    
+    bio_by_district = {district: bio_values_all[start:start + n]
+                       for district, start, n in zip(stats.index, stats["start"], stats["count"])}
     
-    # Compute biometric risk for each district (optimized - CSV already loaded)
     results = []
-    for district in districts:
-        # Get district data from already-loaded CSV
-        district_df = df[df['district'] == district].copy()
+    for district, risk, gap_abs_mean, negative_gap_ratio, points in zip(
+            stats.index, raw_risk, stats["gap_abs_mean"], stats["negative_gap_ratio"], stats["count"]):
+        bio_values = bio_by_district[district]
         
-        if len(district_df) < 3:
-            continue
+        # Get trend data (all available months, repeated/truncated to 30 points);
+        # stays a float64 array - orjson writes it directly
+        trend_data = expand_trend_values(bio_values)
         
-        # Sort by month
-        district_df = district_df.sort_values('month')
-        
-        # Calculate risk components directly from district data
-        try:
-            bio_values = district_df['total_bio_updates'].values
-            
-            # Calculate gap metrics (statistical approach - no ML model needed)
-            mean_bio = bio_values.mean()
-            std_bio = bio_values.std()
-            
-            # Gap from mean
-            gap_abs_mean = std_bio if std_bio > 0 else 0
-            
-            # Negative gap ratio (months below mean)
-            negative_gap_ratio = (bio_values < mean_bio).mean()
-            
-            # Trend (simple linear)
-            if len(bio_values) >= 2:
-                gap_trend = (bio_values[-1] - bio_values[0]) / len(bio_values)
-            else:
-                gap_trend = 0
-            
-            # Calculate raw risk score (statistical formula)
-            raw_risk = np.log1p(gap_abs_mean) + (negative_gap_ratio * 10) + (abs(gap_trend) / 1000)
-            
-            # Get trend data (all available months)
-            trend_data = bio_values.tolist()
-            if len(trend_data) > 30:
-                trend_data = trend_data[-30:]
-            elif len(trend_data) < 30:
-                # Pad by repeating values
-                days_per_month = 30 // len(trend_data)
-                remainder = 30 % len(trend_data)
-                daily_trend = []
-                for i, monthly_val in enumerate(trend_data):
-                    days_for_this_month = days_per_month + (1 if i < remainder else 0)
-                    daily_trend.extend([monthly_val] * days_for_this_month)
-                trend_data = daily_trend[:30]
-            
-            results.append({
-                "district": district,
-                "raw_risk": float(raw_risk),
-                "bio_gap_abs_mean_30": float(gap_abs_mean),
-                "bio_negative_gap_ratio_30": float(negative_gap_ratio),
-                "points_used": len(district_df),
-                "trend_data": [float(x) for x in trend_data]
-            })
-            
-        except Exception as e:
-            # Skip on error
-            continue
+        results.append({
+            "district": district,
+            "raw_risk": float(risk),
+            "bio_gap_abs_mean_30": float(gap_abs_mean),
+            "bio_negative_gap_ratio_30": float(negative_gap_ratio),
+            "points_used": int(points),
+            "trend_data": trend_data
+        })
     
     if not results:
         return {
@@ -368,43 +426,20 @@ def biometric_hotspots(state: str):
             }
         }
     
-    # Normalize risk scores using percentile-based approach
-    raw_risks = [r["raw_risk"] for r in results]
-    raw_risks_array = np.array(raw_risks)
+    # Normalize risk scores using percentile-based approach (one vectorized pass)
+    from backend.ml.risk.shared_analysis import percentile_risk_scores, severity_levels
     
-    p25 = np.percentile(raw_risks_array, 25)
-    p50 = np.percentile(raw_risks_array, 50)
-    p75 = np.percentile(raw_risks_array, 75)
-    p90 = np.percentile(raw_risks_array, 90)
+    raw_risks_array = np.fromiter((r["raw_risk"] for r in results), dtype=float, count=len(results))
+    raw_scores = percentile_risk_scores(raw_risks_array)
+    severities = severity_levels(raw_scores)
+    scores = np.round(raw_scores, 2)
     
     # Process each district with normalized scores
     hotspots = []
-    for r in results:
-        raw_risk = r["raw_risk"]
-        
-        # Map percentiles to risk scores (1-10 scale)
-        if raw_risk <= p25:
-            score = 1.0 + (raw_risk / p25) * 2.0 if p25 > 0 else 2.0
-        elif raw_risk <= p50:
-            score = 3.0 + ((raw_risk - p25) / (p50 - p25)) * 2.0 if p50 > p25 else 4.0
-        elif raw_risk <= p75:
-            score = 5.0 + ((raw_risk - p50) / (p75 - p50)) * 2.0 if p75 > p50 else 6.0
-        elif raw_risk <= p90:
-            score = 7.0 + ((raw_risk - p75) / (p90 - p75)) * 2.0 if p90 > p75 else 8.0
-        else:
-            score = 9.0 + min(1.0, (raw_risk - p90) / (max(raw_risks) - p90)) if max(raw_risks) > p90 else 9.5
-        
-        # Determine severity
-        if score >= 7.0:
-            severity = "Severe"
-        elif score >= 4.0:
-            severity = "Moderate"
-        else:
-            severity = "Low"
-        
+    for r, score, severity in zip(results, scores.tolist(), severities.tolist()):
         hotspots.append({
             "district": r["district"],
-            "score": round(score, 2),
+            "score": score,
             "severity": severity,
             "bio_gap_abs_mean_30": round(r["bio_gap_abs_mean_30"], 2),
             "bio_negative_gap_ratio_30": round(r["bio_negative_gap_ratio_30"] * 100, 1),
@@ -416,21 +451,22 @@ def biometric_hotspots(state: str):
     # Sort by score descending
     hotspots.sort(key=lambda x: x["score"], reverse=True)
     
-    # Calculate state-level metrics
-    avg_risk_score = sum(h["score"] for h in hotspots) / len(hotspots) if hotspots else 0
-    severe_count = sum(1 for h in hotspots if h["severity"] == "Severe")
+    # Calculate state-level metrics (from the score/severity arrays already computed)
+    avg_risk_score = float(scores.mean())
+    severe_count = int(np.count_nonzero(severities == "Severe"))
     worst_district = {"name": hotspots[0]["district"], "score": hotspots[0]["score"]} if hotspots else None
     
     # Calculate compare_to_avg for each district
     for h in hotspots:
         h["compare_to_avg"] = round(h["score"] - avg_risk_score, 2)
     
-    # Determine trend (compare recent vs older biometric data)
+    # Determine trend (compare recent vs older state-wide monthly totals)
     try:
-        state_df = df.sort_values('month')
-        if len(state_df) >= 6:
-            recent = state_df.tail(3)['total_bio_updates'].mean()
-            older = state_df.head(3)['total_bio_updates'].mean()
+        monthly_totals = df.groupby('month', sort=True)['total_bio_updates'].sum().to_numpy()
+        window = min(3, len(monthly_totals) // 2)
+        if window >= 1:
+            recent = monthly_totals[-window:].mean()
+            older = monthly_totals[:window].mean()
             if recent > older * 1.05:
                 trend = "Improving"
             elif recent < older * 0.95:
@@ -457,10 +493,8 @@ def biometric_hotspots(state: str):
             "model_type": "Statistical biometric gap analysis (ML models not available)",
             "timestamp": datetime.now().isoformat(),
             "data_lineage": "CSV → Statistical Analysis → Risk Score",
-            "districts_analyzed": len(districts),
+            "districts_analyzed": len(counts),
             "districts_with_data": len(results),
             "last_data_date": get_last_data_date()
         }
     }
-
-
@@ -1,7 +1,18 @@
 import re
+from functools import lru_cache
 
 def slugify_key(s: str) -> str:
     s = str(s).strip().lower()
     s = re.sub(r"\s+", "_", s)
     s = re.sub(r"[^a-z0-9_]+", "", s)
     return s
+
+
+@lru_cache(maxsize=4096)
+def clean_name(s: str) -> str:
+    """
+    Canonical stored form of a district (or unmapped state) name: collapsed
+    whitespace, title case. Applied once at ingest, so lookups against the DB
+    or cached frame only need the same transform on the user's input.
+    """
+    return " ".join(str(s).strip().split()).title()
@@ -0,0 +1,78 @@
+"""
+Fast JSON responses backed by orjson.
+
+FastAPI's default JSONResponse runs the payload through jsonable_encoder and
+the stdlib json module, converting every float in Python. orjson serializes
+in native code and, with OPT_SERIALIZE_NUMPY, writes NumPy arrays/scalars
+directly (no .tolist() / float() round-trip needed).
+
+Return an instance directly from a route (not via response_class) so
+FastAPI skips jsonable_encoder entirely.
+"""
+from itertools import islice
+from typing import Any, Iterator
+
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    # pd.Timestamp (a datetime subclass orjson won't take natively) and other
+    # date-likes: same isoformat() string jsonable_encoder would produce
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    # NumPy scalars/arrays orjson can't handle natively (e.g. non-contiguous)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONNumpyResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=_OPTIONS,
+        )
+
+
+def _frame_rows(frame) -> Iterator[tuple]:
+    # One .tolist() per column (native Python values in C), then zip into rows,
+    # instead of to_dict(orient="records") boxing every cell on its own
+    return zip(*(frame[col].to_numpy().tolist() for col in frame.columns))
+
+
+def frame_records(frame) -> list:
+    """Same list as frame.to_dict(orient="records"), built column-wise."""
+    columns = list(frame.columns)
+    return [dict(zip(columns, row)) for row in _frame_rows(frame)]
+
+
+def _iter_records_json(head: dict, key: str, frame, batch_size: int) -> Iterator[bytes]:
+    # {...head, "key": [ then the records a batch at a time, then ]}
+    yield orjson.dumps(head, default=_default, option=_OPTIONS)[:-1] + b',"' + key.encode() + b'":['
+    columns = list(frame.columns)
+    rows = _frame_rows(frame)
+    first = True
+    while True:
+        batch = [dict(zip(columns, row)) for row in islice(rows, batch_size)]
+        if not batch:
+            break
+        yield (b"" if first else b",") + orjson.dumps(batch, default=_default, option=_OPTIONS)[1:-1]
+        first = False
+    yield b"]}"
+
+
+def stream_records_response(head: dict, key: str, frame, batch_size: int = 1000) -> StreamingResponse:
+    """
+    The JSON document `{**head, key: frame.to_dict(orient="records")}`, sent as
+    it is serialized (batch_size rows per chunk): the first bytes go out right
+    away and no full records list / payload is held in memory. `head` must be
+    non-empty.
+    """
+    return StreamingResponse(_iter_records_json(head, key, frame, batch_size),
+                             media_type="application/json")
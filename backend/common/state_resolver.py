@@ -1,5 +1,9 @@
+import re
+import time
+from functools import lru_cache
+
 from backend.db.session import SessionLocal
-from backend.db.models import UIDAIRecord
+from backend.db.models import UIDAIRecord, StateDim
 
 # Comprehensive state abbreviations mapping
 ABBREVIATIONS = {
@@ -64,17 +68,74 @@ CANONICAL_STATES = {
     "ANDAMAN & NICOBAR ISLANDS": "Andaman and Nicobar Islands",
 }
 
+# The DB state list is memoized per process; entries also expire after this
+# long so workers that didn't run an ingestion pick up new states.
+STATE_CACHE_TTL_SECONDS = 300
+
+
+def cache_epoch() -> int:
+    """
+    Changes every STATE_CACHE_TTL_SECONDS; part of the memo keys below. Other
+    modules key their own data-dependent memos on it to expire with them.
+    """
+    return int(time.monotonic() // STATE_CACHE_TTL_SECONDS)
+
+
 # Invalid state entries to filter out
-INVALID_STATES = {
+INVALID_STATES = frozenset({
     "", "NA", "N/A", "UNKNOWN", "NULL", "-", "0", "NONE", "NOT AVAILABLE", "NOT SPECIFIED"
+})
+
+# Common misspellings and variations, keyed by the alphanumeric-only uppercase form
+SPELLING_VARIATIONS = {
+    'WESTBENGAL': 'West Bengal',
+    'WESTBANGAL': 'West Bengal',
+    'WESTBENGOL': 'West Bengal',
+    'TAMILNADU': 'Tamil Nadu',
+    'UTTARPRADESH': 'Uttar Pradesh',
+    'MADHYAPRADESH': 'Madhya Pradesh',
+    'ANDHRAPRADESH': 'Andhra Pradesh',
+    'ARUNACHALPRADESH': 'Arunachal Pradesh',
+    'HIMACHALPRADESH': 'Himachal Pradesh',
+    'CHHATISGARH': 'Chhattisgarh',
+    'CHATTISGARH': 'Chhattisgarh',
+    'CHHATTISGARH': 'Chhattisgarh',
+    'JHARKAND': 'Jharkhand',
+    'UTTARAKHAND': 'Uttarakhand',
+    'UTTARANCHAL': 'Uttarakhand',
+    'ORISSA': 'Odisha',
+    'PONDICHERRY': 'Puducherry',
+    'ANDAMANANDNICOBARISLANDS': 'Andaman and Nicobar Islands',
+    'ANDAMANANDNICOBAR': 'Andaman and Nicobar Islands',
+    'ANDAMANNICOBAR': 'Andaman and Nicobar Islands',
+    'DADRAANDNAGARHAVELI': 'Dadra and Nagar Haveli and Daman and Diu',
+    'DADRAANDNAGARHAVELANDDAMANANDDIU': 'Dadra and Nagar Haveli and Daman and Diu',
+    'DAMANANDDIU': 'Dadra and Nagar Haveli and Daman and Diu',
+    'DADRANAGARHAVELI': 'Dadra and Nagar Haveli and Daman and Diu',
+    'JAMMUANDKASHMIR': 'Jammu and Kashmir',
+    'JAMMUKASHMIR': 'Jammu and Kashmir',
 }
 
+# Merged lookups built once: exact uppercase form (abbreviations take priority
+# over canonical variants, as before) and the alphanumeric-only form.
+_ALL_LOOKUPS = {**CANONICAL_STATES, **ABBREVIATIONS}
+_CLEAN_LOOKUPS = dict(SPELLING_VARIATIONS)
 
+# Everything that isn't a letter/digit (same set str.isalnum() keeps). A
+# compiled regex strips it in C; numba would not help here - string code
+# falls back to object mode and runs slower than plain Python.
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+
+@lru_cache(maxsize=1024)
 def normalize_state_name(state_name: str) -> str:
     """
     Normalize a state name to its canonical form with aggressive normalization
     to handle spelling variations and dirty data.
     
+    Memoized: inputs repeat heavily (a few dozen distinct raw spellings across
+    every DB row / ingested record).
+    
     Args:
         state_name: Raw state name from database
         
@@ -86,9 +147,10 @@ def normalize_state_name(state_name: str) -> str:
     
     # Strip whitespace
     normalized = state_name.strip()
+    upper = normalized.upper()
     
     # Check if invalid
-    if normalized.upper() in INVALID_STATES:
+    if upper in INVALID_STATES:
         return None
     
     # Filter out numeric-only entries
@@ -96,70 +158,59 @@ def normalize_state_name(state_name: str) -> str:
         return None
     
     # Remove "The" prefix if present
-    if normalized.upper().startswith("THE "):
+    if upper.startswith("THE "):
         normalized = normalized[4:].strip()
+        upper = normalized.upper()
     
-    # Check abbreviations first
-    if normalized.upper() in ABBREVIATIONS:
-        return ABBREVIATIONS[normalized.upper()]
-    
-    # Check canonical mappings (case-insensitive)
-    if normalized.upper() in CANONICAL_STATES:
-        return CANONICAL_STATES[normalized.upper()]
+    # Abbreviations / canonical mappings (case-insensitive), one probe
+    result = _ALL_LOOKUPS.get(upper)
+    if result:
+        return result
     
     # Aggressive normalization for fuzzy matching
     # Remove spaces, special characters, convert to uppercase for comparison
-    clean_input = ''.join(c.upper() for c in normalized if c.isalnum())
-    
-    # Common misspellings and variations mapping
-    SPELLING_VARIATIONS = {
-        'WESTBENGAL': 'West Bengal',
-        'WESTBANGAL': 'West Bengal',
-        'WESTBENGOL': 'West Bengal',
-        'TAMILNADU': 'Tamil Nadu',
-        'UTTARPRADESH': 'Uttar Pradesh',
-        'MADHYAPRADESH': 'Madhya Pradesh',
-        'ANDHRAPRADESH': 'Andhra Pradesh',
-        'ARUNACHALPRADESH': 'Arunachal Pradesh',
-        'HIMACHALPRADESH': 'Himachal Pradesh',
-        'CHHATISGARH': 'Chhattisgarh',
-        'CHATTISGARH': 'Chhattisgarh',
-        'CHHATTISGARH': 'Chhattisgarh',
-        'JHARKAND': 'Jharkhand',
-        'UTTARAKHAND': 'Uttarakhand',
-        'UTTARANCHAL': 'Uttarakhand',
-        'ORISSA': 'Odisha',
-        'PONDICHERRY': 'Puducherry',
-        'ANDAMANANDNICOBARISLANDS': 'Andaman and Nicobar Islands',
-        'ANDAMANANDNICOBAR': 'Andaman and Nicobar Islands',
-        'ANDAMANNICOBAR': 'Andaman and Nicobar Islands',
-        'DADRAANDNAGARHAVELI': 'Dadra and Nagar Haveli and Daman and Diu',
-        'DADRAANDNAGARHAVELANDDAMANANDDIU': 'Dadra and Nagar Haveli and Daman and Diu',
-        'DAMANANDDIU': 'Dadra and Nagar Haveli and Daman and Diu',
-        'DADRANAGARHAVELI': 'Dadra and Nagar Haveli and Daman and Diu',
-        'JAMMUANDKASHMIR': 'Jammu and Kashmir',
-        'JAMMUKASHMIR': 'Jammu and Kashmir',
-    }
+    clean_input = _NON_ALNUM.sub("", upper)
     
     # Check spelling variations
-    if clean_input in SPELLING_VARIATIONS:
-        return SPELLING_VARIATIONS[clean_input]
+    result = _CLEAN_LOOKUPS.get(clean_input)
+    if result:
+        return result
     
     # For Dadra specifically, check if it contains the key parts
     # This catches any variation of "Dadra ... Nagar Haveli ... Daman ... Diu"
-    normalized_upper = normalized.upper()
-    if ('DADRA' in normalized_upper and 'NAGAR' in normalized_upper and 
-        'HAVELI' in normalized_upper and 'DAMAN' in normalized_upper and 'DIU' in normalized_upper):
+    if ('DADRA' in upper and 'NAGAR' in upper and 
+        'HAVELI' in upper and 'DAMAN' in upper and 'DIU' in upper):
         return 'Dadra and Nagar Haveli and Daman and Diu'
     
     # Title case for consistency
     return normalized.title()
 
 
+def canonical_state_name(state_name: str) -> str:
+    """
+    State name exactly as stored at ingest: the normalized canonical name,
+    or the cleaned (whitespace-collapsed, title-cased) input if it isn't a
+    known state. Use this for equality filters on stored `state` values.
+    """
+    from backend.common.key_utils import clean_name
+    return normalize_state_name(state_name) or clean_name(state_name)
+
+
+class _Unresolved(Exception):
+    """DB unavailable/empty: resolution fell back to the normalized name (not cached)."""
+    def __init__(self, normalized: str):
+        super().__init__(normalized)
+        self.normalized = normalized
+
+
 def resolve_state(user_input: str) -> str:
     """
     Resolve user input to a canonical state name.
     
+    States are a small fixed set, so resolutions are memoized
+    (resolve_state.cache_clear() resets them). Cold-start fallbacks, where
+    the DB could not be consulted, are not cached.
+    
     Args:
         user_input: State name or abbreviation from user
         
@@ -169,6 +220,14 @@ def resolve_state(user_input: str) -> str:
     Raises:
         ValueError: If state cannot be resolved
     """
+    try:
+        return _resolve_state_cached(user_input, cache_epoch())
+    except _Unresolved as e:
+        return e.normalized
+
+
+@lru_cache(maxsize=256)
+def _resolve_state_cached(user_input: str, epoch: int) -> str:
     if not user_input:
         raise ValueError("State is required")
 
@@ -178,36 +237,38 @@ def resolve_state(user_input: str) -> str:
     if not normalized:
         raise ValueError(f"Invalid state input: '{user_input}'")
     
-    # Try to get states from database, but handle cold-start failures gracefully
-    db_states = []
+    # Canonical states from the shared memoized DB query, but handle
+    # cold-start failures gracefully
     try:
-        session = SessionLocal()
-        try:
-            states_query = session.query(UIDAIRecord.state).distinct().all()
-            db_states = [normalize_state_name(s[0]) for s in states_query if s[0]]
-            db_states = [s for s in db_states if s]  # Filter None values
-        finally:
-            session.close()
+        exact_index, lowered, prefix_trie = _state_index(epoch)
+    except _NoStates:
+        # If no states in DB, return normalized form
+        raise _Unresolved(normalized)
     except Exception as e:
         # Database not ready (cold start) - proceed with normalized name
         import logging
         logger = logging.getLogger(__name__)
         logger.warning(f"DB query failed during state resolution (cold start?): {e}")
         # Return normalized form - don't crash the API
-        return normalized
+        raise _Unresolved(normalized)
     
-    # If no states in DB, return normalized form
-    if not db_states:
-        return normalized
+    key = normalized.lower()
     
-    # Exact match (case-insensitive)
-    for st in db_states:
-        if st.lower() == normalized.lower():
-            return st
+    # Exact match (case-insensitive): one dict probe
+    st = exact_index.get(key)
+    if st is not None:
+        return st
+    
+    # Prefix match ("Tam" -> "Tamil Nadu"): walk the trie, O(len(key)).
+    # Only a unique prefix resolves; an ambiguous one ("Ma" -> Madhya Pradesh,
+    # Maharashtra, ...) falls through to the substring scan
+    matches = _trie_lookup(prefix_trie, key)
+    if len(matches) == 1:
+        return matches[0]
     
-    # Partial match
-    for st in db_states:
-        if normalized.lower() in st.lower():
+    # Partial match anywhere in the name (~36 entries, lowercase forms precomputed)
+    for st_lower, st in lowered:
+        if key in st_lower:
             return st
     
     # If no match found, return normalized form anyway
@@ -215,32 +276,110 @@ def resolve_state(user_input: str) -> str:
     return normalized
 
 
+resolve_state.cache_clear = _resolve_state_cached.cache_clear
+
+
+# Trie nodes are plain dicts keyed by character; _MATCHES (never a real
+# character) holds the canonical names that pass through that node, in order.
+_MATCHES = ""
+
+
+def _build_prefix_trie(lowered) -> dict:
+    root = {_MATCHES: []}
+    for st_lower, st in lowered:
+        node = root
+        node[_MATCHES].append(st)
+        for ch in st_lower:
+            node = node.setdefault(ch, {_MATCHES: []})
+            node[_MATCHES].append(st)
+    return root
+
+
+def _trie_lookup(trie: dict, prefix: str) -> list:
+    """Canonical names starting with `prefix` (lowercase), in DB-list order."""
+    node = trie
+    for ch in prefix:
+        node = node.get(ch)
+        if node is None:
+            return []
+    return node[_MATCHES]
+
+
+@lru_cache(maxsize=1)
+def _state_index(epoch: int):
+    """
+    ({lowercase: canonical}, ((lowercase, canonical), ...), prefix trie)
+    for the DB state list.
+    """
+    db_states = _canonical_states_cached(epoch)
+    lowered = tuple((st.lower(), st) for st in db_states)
+    exact_index = {}
+    for st_lower, st in lowered:
+        exact_index.setdefault(st_lower, st)  # first wins, like the old scan
+    return exact_index, lowered, _build_prefix_trie(lowered)
+
+
+def search_states(prefix: str) -> list:
+    """
+    Canonical states whose name starts with `prefix` (case-insensitive),
+    sorted alphabetically - e.g. for state autocomplete. Empty if the DB
+    can't be read.
+    """
+    try:
+        _, _, prefix_trie = _state_index(cache_epoch())
+    except Exception:
+        return []
+    return list(_trie_lookup(prefix_trie, " ".join(prefix.split()).lower()))
+
+
+class _NoStates(Exception):
+    """DB reachable but empty (nothing ingested yet) - not cached."""
+
+
+@lru_cache(maxsize=1)
+def _canonical_states_cached(epoch: int) -> tuple:
+    session = SessionLocal()
+    try:
+        # Distinct states come from the small state_dim table (rebuilt on
+        # ingest); only scan uidai_records if it hasn't been populated yet
+        states_query = session.query(StateDim.name).all()
+        if not states_query:
+            states_query = session.query(UIDAIRecord.state).distinct().all()
+        raw_states = [s[0] for s in states_query if s[0]]
+        
+        # Normalize all states
+        normalized_states = set()
+        for state in raw_states:
+            canonical = normalize_state_name(state)
+            if canonical:
+                normalized_states.add(canonical)
+        
+        if not normalized_states:
+            raise _NoStates()
+        
+        # Sort alphabetically
+        return tuple(sorted(normalized_states))
+        
+    finally:
+        session.close()
+
+
 def get_all_canonical_states() -> list:
     """
     Get all unique canonical state names from the database.
     
+    The state set only changes on ingestion (which rebuilds the small
+    state_dim table), so it is read at most once per STATE_CACHE_TTL_SECONDS
+    per process (resolve_state shares it); refresh_state_cache() resets it
+    right after new data is loaded.
+    
     Returns:
         List of canonical state names, sorted alphabetically
     """
     try:
-        session = SessionLocal()
-        try:
-            # Get all distinct states from database
-            states_query = session.query(UIDAIRecord.state).distinct().all()
-            raw_states = [s[0] for s in states_query if s[0]]
-            
-            # Normalize all states
-            normalized_states = set()
-            for state in raw_states:
-                canonical = normalize_state_name(state)
-                if canonical:
-                    normalized_states.add(canonical)
-            
-            # Sort alphabetically
-            return sorted(list(normalized_states))
-            
-        finally:
-            session.close()
+        return list(_canonical_states_cached(cache_epoch()))
+    except _NoStates:
+        return []
     except Exception as e:
         # Database not ready (cold start) - return default list
         import logging
@@ -255,3 +394,10 @@ def get_all_canonical_states() -> list:
             "Rajasthan", "Sikkim", "Tamil Nadu", "Telangana", "Tripura",
             "Uttar Pradesh", "Uttarakhand", "West Bengal", "Delhi"
         ]
+
+
+def refresh_state_cache() -> None:
+    """Drop memoized state lists/resolutions (call after data is (re)loaded)."""
+    _canonical_states_cached.cache_clear()
+    _state_index.cache_clear()
+    _resolve_state_cached.cache_clear()
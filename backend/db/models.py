@@ -1,5 +1,5 @@
 # Database models module
-from sqlalchemy import Column, Integer, String, Date, DateTime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index
 from sqlalchemy.sql import func
 from backend.db.base import Base
 
@@ -17,6 +17,24 @@ class UIDAIRecord(Base):
     source_file = Column(String)
     created_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        # Per-state/district monthly aggregates (ml/common series, and via its
+        # (dataset_type, state) prefix biometric_failure_rate). On PostgreSQL
+        # metric_name/metric_value are INCLUDEd so those SUMs are index-only.
+        Index(
+            "ix_uidai_dtype_state_district_date",
+            "dataset_type", "state", "district", "date",
+            postgresql_include=["metric_name", "metric_value"],
+        ),
+    )
+
+class StateDim(Base):
+    """Distinct states in uidai_records, rebuilt after each ingest (tiny, cheap to scan)."""
+    __tablename__ = "state_dim"
+
+    name = Column(String, primary_key=True)
+
+
 from sqlalchemy import Boolean
 
 class Alert(Base):
@@ -1,7 +1,7 @@
 import os
 import logging
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 # Configure logging
@@ -19,12 +19,17 @@ if DATABASE_URL:
     
     logger.info("🔌 Connecting to production PostgreSQL database...")
     
+    # Pool sizing is tunable per instance (e.g. match Render vCPUs / worker count)
     engine = create_engine(
         DATABASE_URL,
         pool_pre_ping=True,       # Verify connections before using (critical for cloud DBs)
-        pool_recycle=300,         # Recycle connections every 5 minutes to avoid stale connections
-        pool_size=10,             # Keep up to 10 connections open
-        max_overflow=20,          # Allow up to 20 temporary extra connections
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),  # Recycle connections (seconds) to avoid stale ones
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),          # Connections kept open
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),    # Temporary extra connections under bursts
+        pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),    # Seconds to wait for a free connection
+        pool_use_lifo=True,       # Reuse the most recent (warm) connection; idle extras age out
+        echo_pool="debug" if os.getenv("DB_POOL_DEBUG") == "1" else False,  # Log checkouts to spot exhaustion
+        executemany_mode="values_plus_batch",  # psycopg2: multi-row INSERTs, one round-trip per page
         connect_args={
             "keepalives": 1,
             "keepalives_idle": 30,
@@ -46,6 +51,18 @@ else:
         connect_args={"check_same_thread": False}
     )
 
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL: readers don't block the writer during bulk loads;
+        # synchronous=NORMAL: fsync at checkpoints instead of every commit
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-65536")     # 64 MB page cache (negative = KiB)
+        cursor.execute("PRAGMA temp_store=MEMORY")     # sorts / temp indexes in RAM
+        cursor.execute("PRAGMA mmap_size=268435456")   # 256 MB memory-mapped reads
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -1,20 +1,40 @@
 # Biometric features module
-from sqlalchemy import func
-from backend.db.session import SessionLocal
+from functools import lru_cache
+
+from sqlalchemy import func, select
+from backend.db.session import engine
 from backend.db.models import UIDAIRecord
+from backend.common.state_resolver import cache_epoch
+
 
 def biometric_failure_rate(state):
-    session = SessionLocal()
+    """
+    Average biometric metric value for a state.
+    
+    Memoized per state; the value only changes on ingestion, which clears it
+    in the ingesting process (biometric_failure_rate.cache_clear()). Entries
+    also expire with the shared state-cache epoch (STATE_CACHE_TTL_SECONDS),
+    so other workers pick up new data.
+    """
+    return _biometric_failure_rate_cached(state, cache_epoch())
+
 
-    value = (
-        session.query(func.avg(UIDAIRecord.metric_value))
-        .filter(
+@lru_cache(maxsize=64)
+def _biometric_failure_rate_cached(state, epoch: int):
+    # Single scalar aggregate: plain Core connection (no ORM session/identity
+    # map), returned to the pool even if the query raises
+    stmt = (
+        select(func.avg(UIDAIRecord.metric_value))
+        .where(
             UIDAIRecord.dataset_type == "BIOMETRIC",
             UIDAIRecord.state == state
         )
-        .scalar()
     )
 
-    session.close()
+    with engine.connect() as conn:
+        value = conn.execute(stmt).scalar()
+
     return value or 0
 
+
+biometric_failure_rate.cache_clear = _biometric_failure_rate_cached.cache_clear
@@ -1,13 +1,110 @@
+import csv
 from pathlib import Path
 import pandas as pd
 
-def load_all_csvs(folder: Path):
+from backend.validation.data_contract import DATASET_CONTRACT
+
+# Optional: PyArrow's multithreaded native CSV reader (falls back to pandas)
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# Dtype hints, keyed by the header as normalize_columns will rename it. Keys
+# and dates stay strings (pincodes keep leading zeros; dates are parsed
+# day-first by validate_dataset); metric counts parse natively as numbers.
+_STRING_COLUMNS = frozenset({"date", "month", "state", "district", "pincode"})
+_METRIC_PREFIXES = tuple(sorted({
+    prefix for rules in DATASET_CONTRACT.values() for prefix in rules["metric_prefixes"]
+}))
+
+
+def _read_header(csv_file: Path) -> list:
+    with open(csv_file, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def _column_dtypes(header: list) -> dict:
+    """Raw header name -> "string" / "float64" for the columns we recognise."""
+    dtypes = {}
+    for name in header:
+        key = name.strip().lower().replace(" ", "_")
+        if key in _STRING_COLUMNS:
+            dtypes[name] = "string"
+        elif key.startswith(_METRIC_PREFIXES):
+            dtypes[name] = "float64"
+    return dtypes
+
+
+def _read_with_pyarrow(csv_file: Path, chunksize: int, dtypes: dict):
+    # Incremental reader: only ~one block plus one chunk is held at a time.
+    # Record batches follow the block size, so they are re-cut into frames of
+    # exactly chunksize rows (the last one may be shorter)
+    reader = pacsv.open_csv(
+        csv_file,
+        read_options=pacsv.ReadOptions(block_size=8 << 20),
+        convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() if t == "string" else pa.float64()
+                          for name, t in dtypes.items()},
+        ),
+    )
+    pending, rows = [], 0
+    for batch in reader:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            yield table.slice(0, chunksize).to_pandas()
+            rest = table.slice(chunksize)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield pa.Table.from_batches(pending, schema=reader.schema).to_pandas()
+
+
+def find_csv_files(folder: Path) -> list:
     csv_files = list(folder.rglob("*.csv"))
 
     if not csv_files:
         raise FileNotFoundError(f"No CSV files found in {folder}")
 
-    for csv_file in csv_files:
-        df = pd.read_csv(csv_file)
-        yield csv_file.name, df
+    return csv_files
+
+
+def iter_csv_chunks(csv_file: Path, chunksize: int = 100_000):
+    """Yield DataFrames of up to `chunksize` rows from one CSV file."""
+    dtypes = _column_dtypes(_read_header(csv_file))
+    chunks = None
+    if PYARROW_AVAILABLE:
+        try:
+            chunks = _read_with_pyarrow(csv_file, chunksize, dtypes)
+            first = next(chunks, None)
+        except Exception:
+            chunks = None  # e.g. non-numeric metric value: let pandas handle it
+    if chunks is not None:
+        # Past the first chunk earlier rows may already be saved, so a later
+        # parse error propagates instead of re-reading the file with pandas
+        if first is not None:
+            yield first
+        yield from chunks
+        return
+
+    # pandas only gets the string hints: its float parse would reject values
+    # that validate_dataset coerces to 0
+    string_dtypes = {name: str for name, t in dtypes.items() if t == "string"}
+    yield from pd.read_csv(csv_file, chunksize=chunksize, dtype=string_dtypes)
+
+
+def load_all_csvs(folder: Path, chunksize: int = 100_000):
+    """
+    Yield (filename, DataFrame) pairs for every CSV under `folder`.
 
+    Files are streamed in chunks of `chunksize` rows, so a large file yields
+    several frames with the same filename and only one chunk is in memory at
+    a time.
+    """
+    for csv_file in find_csv_files(folder):
+        for chunk in iter_csv_chunks(csv_file, chunksize):
+            yield csv_file.name, chunk
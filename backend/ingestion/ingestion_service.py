@@ -1,29 +1,77 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 from backend.ingestion.zip_handler import extract_zip
-from backend.ingestion.csv_loader import load_all_csvs
+from backend.ingestion.csv_loader import find_csv_files, iter_csv_chunks
 
 from backend.validation.normalizer import normalize_columns
 from backend.validation.schema_detector import detect_dataset_type
 from backend.validation.validator import validate_dataset
 
-from backend.db.session import SessionLocal
-from backend.db.models import UIDAIRecord
-from backend.common.state_resolver import normalize_state_name
+from backend.db.session import engine
+from backend.db.models import UIDAIRecord, StateDim
+from backend.common.state_resolver import canonical_state_name, refresh_state_cache
+from backend.common.key_utils import clean_name
+from backend.features.biometric_features import biometric_failure_rate
 
 # ✅ Always resolve project root from this file location
 PROJECT_ROOT = Path(__file__).resolve().parents[1]  # backend/ingestion -> backend -> project root
 
 
+_COPY_COLUMNS = ["dataset_type", "date", "state", "district", "pincode",
+                 "source_file", "metric_name", "metric_value"]
+
+
+def _copy_to_postgres(long: pd.DataFrame) -> int:
+    """
+    Bulk-load the long frame with PostgreSQL COPY FROM STDIN (single
+    transaction). NULL is spelled \\N so empty strings (e.g. missing pincode)
+    stay empty strings, as with INSERT.
+    """
+    buf = io.StringIO()
+    long.to_csv(buf, columns=_COPY_COLUMNS, index=False, header=False, na_rep="\\N")
+    buf.seek(0)
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.copy_expert(
+            f"COPY {UIDAIRecord.__tablename__} ({', '.join(_COPY_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buf,
+        )
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return len(long)
+
+
+def _map_distinct(column: pd.Series, fn) -> np.ndarray:
+    """fn(str(value)) for every row, computed once per distinct value."""
+    codes, uniques = pd.factorize(column.astype(str), use_na_sentinel=False)
+    cleaned = np.array([fn(u) for u in uniques], dtype=object)
+    return cleaned[codes]
+
+
 def save_to_db(df, dataset_type, source_file, batch_size: int = 20000):
     """
     Fast bulk insert.
     Converts wide CSV -> long table (metric_name, metric_value)
-    Inserts in batches for speed.
+    On PostgreSQL the whole frame is streamed with COPY; elsewhere (SQLite)
+    it is inserted in batches with SQLAlchemy Core executemany.
     """
 
-    session = SessionLocal()
-
     # Determine date column based on dataset type
     date_col = "month" if dataset_type == "AGGREGATED_MONTHLY" else "date"
     has_pincode = "pincode" in df.columns
@@ -34,56 +82,155 @@ def save_to_db(df, dataset_type, source_file, batch_size: int = 20000):
         and not c.startswith("__")
     ]
 
-    mappings = []
+    id_cols = ["date", "state", "district", "pincode"]
+    base = pd.DataFrame(index=df.index)
+
+    # One column-level conversion (a no-op parse when validate_dataset already
+    # produced datetime64), no per-value hasattr/.date() calls
+    base["date"] = pd.to_datetime(df[date_col], errors="coerce").dt.date
+
+    # Normalize state/district once per distinct value (few dozen states /
+    # ~1k districts), then scatter back to rows with one integer take
+    base["state"] = _map_distinct(df["state"], canonical_state_name)
+    base["district"] = _map_distinct(df["district"], clean_name)
+
+    base["pincode"] = df["pincode"].astype(str).str.strip() if has_pincode else ""
+
+    for metric in metric_cols:
+        base[metric] = df[metric].astype("int64")
+
+    # Wide -> long in one vectorized reshape
+    long = base.melt(
+        id_vars=id_cols,
+        value_vars=metric_cols,
+        var_name="metric_name",
+        value_name="metric_value",
+    )
+    long["dataset_type"] = dataset_type
+    long["source_file"] = source_file
+
+    if engine.dialect.name == "postgresql":
+        return _copy_to_postgres(long)
+
     inserted = 0
+    insert_stmt = UIDAIRecord.__table__.insert()
+    columns = list(long.columns)
+    # Stream plain tuples (no per-row Series, no N dicts up front)
+    rows = long.itertuples(index=False, name=None)
+
+    # ✅ bulk insert in batches, all inside ONE transaction (single commit/fsync)
+    with engine.begin() as conn:
+        while True:
+            mappings = [dict(zip(columns, row)) for row in islice(rows, batch_size)]
+            if not mappings:
+                break
+            conn.execute(insert_stmt, mappings)
+            inserted += len(mappings)
 
-    for _, row in df.iterrows():
-        date_value = row[date_col]
-        if hasattr(date_value, "date"):
-            date_value = date_value.date()
-
-        # Normalize state safely
-        raw_state = str(row["state"])
-        normalized_state = normalize_state_name(raw_state)
-        # Fallback if normalization fails (though it shouldn't for valid strings)
-        state_val = normalized_state if normalized_state else " ".join(raw_state.strip().split()).title()
-
-        base = {
-            "dataset_type": dataset_type,
-            "date": date_value,
-            "state": state_val,
-            "district": " ".join(str(row["district"]).strip().split()).title(),
-            "pincode": str(row["pincode"]).strip() if has_pincode else "",
-            "source_file": source_file
-        }
-
-        for metric in metric_cols:
-            mappings.append({
-                **base,
-                "metric_name": metric,
-                "metric_value": int(row[metric])
-            })
-
-            # ✅ bulk insert when batch is full
-            if len(mappings) >= batch_size:
-                session.bulk_insert_mappings(UIDAIRecord, mappings)
-                session.commit()
-                inserted += len(mappings)
-                mappings = []
-
-    # insert leftover
-    if mappings:
-        session.bulk_insert_mappings(UIDAIRecord, mappings)
-        session.commit()
-        inserted += len(mappings)
-
-    session.close()
     return inserted
 
 
 
 
 
+def _ingest_one(csv_file: Path) -> dict:
+    """Load one CSV (chunk by chunk) into uidai_records; rows are summed over chunks."""
+    result = {"file": csv_file.name, "dataset_type": None, "rows": 0}
+
+    for df in iter_csv_chunks(csv_file):
+        df = normalize_columns(df)
+
+        dataset_type = detect_dataset_type(df)
+        df = validate_dataset(df, dataset_type)
+
+        result["dataset_type"] = result["dataset_type"] or dataset_type
+        result["rows"] += len(df)
+        save_to_db(df, dataset_type, csv_file.name)
+
+    return result
+
+
+# Rebuild indexes only when the load is at least this large relative to the
+# rows already in the table; smaller appends insert with the indexes in place
+# (live queries keep their indexes and no full-table rebuild is paid)
+INDEX_REBUILD_MIN_RATIO = 0.5
+
+
+# Rough on-disk size of one UIDAI CSV row (date, state, district, pincode and
+# a few counts); only used to size a load against the table, not to count it
+CSV_BYTES_PER_ROW_ESTIMATE = 64
+
+
+def _estimate_csv_rows(csv_files) -> int:
+    """Row estimate from file sizes (a stat per file, no read)."""
+    return sum(os.path.getsize(f) for f in csv_files) // CSV_BYTES_PER_ROW_ESTIMATE
+
+
+def _estimate_table_rows(conn) -> int:
+    """
+    Rows in uidai_records: the planner's estimate (pg_class.reltuples, kept
+    fresh by the ANALYZE after each bulk load) on PostgreSQL, an exact COUNT(*)
+    on SQLite (local dev sizes). 0 means empty.
+    
+    A reltuples of 0 / -1 (truncated or never analyzed) falls back to
+    COUNT(*), which is cheap exactly when the table really is empty.
+    """
+    table = UIDAIRecord.__tablename__
+    if engine.dialect.name == "postgresql":
+        estimate = conn.exec_driver_sql(
+            "SELECT reltuples FROM pg_class WHERE oid = %(table)s::regclass",
+            {"table": table},
+        ).scalar()
+        if estimate is not None and estimate > 0:
+            return int(estimate)
+    return conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table}").scalar() or 0
+
+
+def _should_rebuild_indexes(csv_files) -> bool:
+    with engine.connect() as conn:
+        existing = _estimate_table_rows(conn)
+    if existing == 0:
+        return True
+    # Each CSV row becomes >= 1 long row, so CSV rows under-count the load
+    return _estimate_csv_rows(csv_files) >= existing * INDEX_REBUILD_MIN_RATIO
+
+
+@contextmanager
+def _bulk_load_indexes(enabled: bool = True):
+    """
+    Drop the secondary indexes on uidai_records for the duration of a bulk
+    load and rebuild them once afterwards (one sort per index instead of an
+    index update per inserted row), then ANALYZE so the planner sees the new
+    row counts. Indexes are rebuilt even if the load fails. With
+    enabled=False this does nothing (indexes stay in place).
+    """
+    if not enabled:
+        yield
+        return
+    indexes = list(UIDAIRecord.__table__.indexes)
+    with engine.begin() as conn:
+        for idx in indexes:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {idx.name}")
+    try:
+        yield
+    finally:
+        with engine.begin() as conn:
+            for idx in indexes:
+                idx.create(conn, checkfirst=True)
+            conn.exec_driver_sql(f"ANALYZE {UIDAIRecord.__tablename__}")
+
+
+def refresh_state_dim() -> None:
+    """Rebuild state_dim from the distinct states now in uidai_records."""
+    records = UIDAIRecord.__tablename__
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DELETE FROM {StateDim.__tablename__}")
+        conn.exec_driver_sql(
+            f"INSERT INTO {StateDim.__tablename__} (name) "
+            f"SELECT DISTINCT state FROM {records} WHERE state IS NOT NULL AND state <> ''"
+        )
+
+
 def ingest_uidai_source(source_path: Path):
     if not source_path.exists():
         raise FileNotFoundError(f"{source_path} not found")
@@ -101,21 +248,28 @@ def ingest_uidai_source(source_path: Path):
     else:
         raise ValueError("Source must be a ZIP file or a directory")
 
-    results = []
+    csv_files = find_csv_files(data_dir)
 
-    for filename, df in load_all_csvs(data_dir):
-        df = normalize_columns(df)
-
-        dataset_type = detect_dataset_type(df)
-        df = validate_dataset(df, dataset_type)
-
-        results.append({
-            "file": filename,
-            "dataset_type": dataset_type,
-            "rows": len(df)
-        
-        })
-        save_to_db(df, dataset_type, filename)
+    # Files are independent: parse/melt/insert them in parallel processes,
+    # capped by cores and by DB pool size so inserts don't queue on the pool.
+    # SQLite allows one writer at a time, so it stays sequential.
+    if engine.dialect.name == "sqlite":
+        workers = 1
+    else:
+        workers = min(len(csv_files), os.cpu_count() or 1, engine.pool.size())
+    with _bulk_load_indexes(enabled=_should_rebuild_indexes(csv_files)):
+        if workers > 1:
+            # spawn: workers build their own engine/pool instead of inheriting the
+            # parent's sockets (and threads) through fork
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as ex:
+                results = list(ex.map(_ingest_one, csv_files))
+        else:
+            results = [_ingest_one(csv_file) for csv_file in csv_files]
 
+    # New rows may add/rename states and change cached aggregates
+    refresh_state_dim()
+    refresh_state_cache()
+    biometric_failure_rate.cache_clear()
 
     return results
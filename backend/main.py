@@ -3,12 +3,24 @@
 from backend.config.logging import setup_logging
 setup_logging()
 
+import asyncio
 import logging
+import os
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from fastapi import Request
+from starlette.datastructures import Headers
+from backend.common.responses import ORJSONNumpyResponse
+
+# Optional: brotli compresses the repetitive JSON (district names/keys) better than gzip
+try:
+    from brotli_asgi import BrotliMiddleware
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +28,9 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="UIDAI Trends Platform",
     description="Dynamic analytics & insights for Aadhaar enrolment",
-    version="1.0"
+    version="1.0",
+    # orjson for every route that returns plain dicts/lists
+    default_response_class=ORJSONNumpyResponse,
 )
 
 # ✅ CORS CONFIGURATION - MUST BE BEFORE ROUTES
@@ -35,8 +49,43 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# GZip compression
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+class _CompressExceptStreams:
+    """
+    Compress responses, except SSE streams (compressors buffer chunks until
+    they fill). Decided per response from its Content-Type: a
+    text/event-stream response is sent straight to the client, bypassing the
+    compressor; everything else goes through it.
+    """
+    def __init__(self, app, compressor, **options):
+        self.app = app
+        self.compressed_app = compressor(self._route_response, **options)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # The client's send rides along in the scope so the inner app can reach it
+        await self.compressed_app({**scope, "uidai.client_send": send}, receive, send)
+
+    async def _route_response(self, scope, receive, compressor_send):
+        target = compressor_send
+
+        async def send(message):
+            nonlocal target
+            if message["type"] == "http.response.start":
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                if content_type.startswith("text/event-stream"):
+                    target = scope["uidai.client_send"]
+            await target(message)
+
+        await self.app(scope, receive, send)
+
+
+# Brotli (falls back to gzip for clients without br) or plain GZip compression
+if BROTLI_AVAILABLE:
+    app.add_middleware(_CompressExceptStreams, compressor=BrotliMiddleware, minimum_size=1024, gzip_fallback=True)
+else:
+    app.add_middleware(_CompressExceptStreams, compressor=GZipMiddleware, minimum_size=1024)
 
 # ✅ LIGHTWEIGHT HEALTH ENDPOINT - No DB required (for cold-start wake-up)
 @app.get("/health")
@@ -44,13 +93,51 @@ def health_check_light():
     """Lightweight health check - responds immediately without DB check."""
     return {"status": "ok", "service": "UIDAI Backend", "ready": True}
 
+# Readiness (vs. liveness above): startup DB init finished and no CSV ingestion running
+# One Event per flag: set/cleared from the init thread and the upload
+# background task, read by request threads
+_STARTUP_COMPLETE = threading.Event()
+_INGESTING = threading.Event()
+# Keep a reference to the startup init task so it isn't garbage-collected mid-run
+_BACKGROUND_TASKS = set()
+
+@app.get("/health/ready")
+def health_ready():
+    """503 until the background DB init has finished (and while an upload is being ingested)."""
+    startup_complete = _STARTUP_COMPLETE.is_set()
+    ingesting = _INGESTING.is_set()
+    ready = startup_complete and not ingesting
+    body = {
+        "status": "ready" if ready else "starting",
+        "startup_complete": startup_complete,
+        "ingesting": ingesting,
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
 # ✅ STARTUP EVENT: Initialize database (Schema Only)
 @app.on_event("startup")
 async def startup_event():
     """
-    Initialize database schema on application startup.
+    Initialize database schema on application startup - in a worker thread,
+    so the server starts answering (/health) immediately on a cold start;
+    /health/ready reports when it's done.
     DOES NOT load data automatically. Data must be uploaded via /admin/upload-csv.
     """
+    # Sync (def) routes - all the pandas/sklearn ML endpoints - run on AnyIO's
+    # worker threads; size that pool per instance (AnyIO default: 40)
+    import anyio.to_thread
+    anyio.to_thread.current_default_thread_limiter().total_tokens = int(os.getenv("THREADPOOL_SIZE", "40"))
+    
+    # Pre-load the persisted demographic risk models (disk only, no DB) so
+    # the first /analytics/demographic-risks request does not pay the joblib read
+    from backend.ml.risk.demographic_risk_model import warm_model_cache
+    threading.Thread(target=warm_model_cache, name="demographic-model-warmup", daemon=True).start()
+    
+    init_task = asyncio.create_task(asyncio.to_thread(_init_database))
+    _BACKGROUND_TASKS.add(init_task)
+    init_task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+def _init_database():
     from backend.db.base import Base
     from backend.db.session import engine
     from backend.db import models  # Register models
@@ -58,13 +145,50 @@ async def startup_event():
     try:
         logger.info("🔧 Initializing database schema...")
         Base.metadata.create_all(bind=engine)
+        # create_all skips existing tables, so add indexes introduced later
+        for index in models.UIDAIRecord.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
         logger.info("✅ Database schema verified/created.")
         
+        # Warm the process-wide state list (one read of state_dim, reused by /meta/states, /ml/risk/top-states)
+        from backend.common.state_resolver import get_all_canonical_states
+        get_all_canonical_states()
+        
+        # Fit the global gap anomaly models once (if not persisted yet) in the
+        # background, so prediction requests only score
+        threading.Thread(target=_warm_anomaly_models, name="anomaly-warmup", daemon=True).start()
+        
     except Exception as e:
         logger.error(f"❌ Error during database initialization: {e}")
         # We don't raise here to allow the app to start even if DB is briefly unreachable
+    finally:
+        _STARTUP_COMPLETE.set()
 
-# Import routers AFTER middleware setup
+def _warm_anomaly_models(force: bool = False):
+    from backend.ml.anomaly.predict import warm_gap_anomaly_model
+    from backend.ml.biometric.predict import warm_bio_gap_anomaly_model
+    try:
+        if force:
+            # Data just changed: don't refit on the still-cached old frame
+            from backend.ml.data_loader import load_processed_data
+            load_processed_data(validate=False, force_reload=True, copy=False)
+        warm_gap_anomaly_model(force=force)
+        warm_bio_gap_anomaly_model(force=force)
+        logger.info("✅ Anomaly models ready.")
+    except Exception as e:
+        logger.warning(f"⚠️ Anomaly model warmup failed: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the pooled outbound HTTP client used for Groq."""
+    from backend.api.chat import close_http_client
+    await close_http_client()
+
+# Import routers AFTER middleware setup. Router imports stay eager: FastAPI
+# builds its route table (and OpenAPI schema) from routers included before it
+# serves, so including them on first request would need a dispatch shim in
+# front of the app. Cold-start readiness is handled instead by answering
+# /health while _init_database is still running.
 from backend.api.ingestion import router as ingestion_router
 from backend.api.analytics import router as analytics_router
 from backend.api.features import router as features_router
@@ -131,6 +255,9 @@ from pathlib import Path
 import shutil
 import tempfile
 import os
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_COPY_BUFFER = 4 * 1024 * 1024
 
 @app.post("/admin/upload-csv")
 async def upload_csv_data(
@@ -155,14 +282,17 @@ async def upload_csv_data(
     try:
         # Create a temporary file to store the upload
         suffix = Path(file.filename).suffix
+        # Copy in 4 MB chunks (default is 16-64 KB) on a worker thread so a big
+        # CSV doesn't stall the event loop for other requests
         with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-            shutil.copyfileobj(file.file, tmp_file)
+            await run_in_threadpool(shutil.copyfileobj, file.file, tmp_file, UPLOAD_COPY_BUFFER)
             tmp_path = Path(tmp_file.name)
             
         logger.info(f"Received file: {file.filename}, saved to temp: {tmp_path}")
 
         def process_upload(path: Path):
             """Background task to process the file and clean up."""
+            _INGESTING.set()
             try:
                 logger.info("⏳ Starting background ingestion...")
                 
@@ -199,9 +329,13 @@ async def upload_csv_data(
                 results = ingest_uidai_source(upload_dir)
                 logger.info(f"✅ Ingestion complete: {results}")
                 
+                # Refit the gap anomaly models on the new history
+                _warm_anomaly_models(force=True)
+                
             except Exception as e:
                 logger.error(f"❌ Ingestion failed: {e}")
             finally:
+                _INGESTING.clear()
                 # Cleanup
                 if upload_dir.exists():
                     shutil.rmtree(upload_dir)
@@ -2,6 +2,7 @@
 Anomaly Model Explanation
 Methods for explaining anomaly detection predictions.
 """
+import numpy as np
 import pandas as pd
 
 
@@ -16,16 +17,11 @@ def explain_anomaly(results: list, top_k: int = 5):
     df["gap"] = pd.to_numeric(df["gap"], errors="coerce").fillna(0)
     df["anomaly_score"] = pd.to_numeric(df["anomaly_score"], errors="coerce").fillna(0)
 
-    df = df.sort_values("anomaly_score", ascending=False).head(top_k)
+    # Partial top-k selection instead of sorting every day
+    df = df.nlargest(top_k, "anomaly_score")
 
-    explained = []
-    for _, r in df.iterrows():
-        reason = "sudden negative gap" if r["gap"] < 0 else "sudden spike"
-        explained.append({
-            "date": r["date"],
-            "anomaly_score": float(r["anomaly_score"]),
-            "gap": float(r["gap"]),
-            "reason": reason
-        })
-
-    return explained
+    # Reasons and output rows built column-wise, no per-row Python loop
+    df["reason"] = np.where(df["gap"].to_numpy() < 0, "sudden negative gap", "sudden spike")
+    return df[["date", "anomaly_score", "gap", "reason"]].astype(
+        {"anomaly_score": float, "gap": float}
+    ).to_dict(orient="records")
@@ -1,33 +1,43 @@
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
 
 from backend.ml.registry import load_model, save_model
+from backend.common.responses import frame_records
 from backend.ml.data_loader import get_monthly_enrolment_series
-from backend.ml.anomaly.train import train_baseline_model
+from backend.ml.anomaly.train import train_baseline_model, make_monthly_features
 
 
 def build_monthly_features(df: pd.DataFrame):
-    """Build features for MONTHLY data."""
-    df = df.copy()
-    df["month_num"] = df["month"].dt.month  # 1-12
-    df["lag_1"] = df["total_enrolment"].shift(1)  # Previous month
-    df["lag_2"] = df["total_enrolment"].shift(2)  # 2 months ago
-    df["roll_3"] = df["total_enrolment"].rolling(3).mean()  # 3-month rolling avg
-    return df
+    """Build features for MONTHLY data (same as training, in place)."""
+    return make_monthly_features(df, "total_enrolment")
 
 
-def train_gap_anomaly_model(df: pd.DataFrame):
+def _fit_gap_anomaly_model(df: pd.DataFrame):
+    """Fit the gap anomaly model in memory (not persisted)."""
     model = IsolationForest(contamination=0.05, random_state=42)
     model.fit(df[["gap"]])
+    return model
+
+
+def train_gap_anomaly_model(df: pd.DataFrame):
+    model = _fit_gap_anomaly_model(df)
     save_model(model, "gap_anomaly")
     return model
 
 
-def predict_gap_and_anomalies(state: str):
+def score_gaps(model, gaps: pd.DataFrame):
     """
-    Predict gaps and anomalies using REAL monthly data from processed CSV.
-    NO PHANTOM MONTHS!
+    (anomaly_flag, anomaly_score) from ONE decision_function pass.
+    IsolationForest.predict is just decision_function < 0 -> -1, so calling
+    both walks every tree twice.
     """
+    decision = model.decision_function(gaps)
+    return np.where(decision < 0, -1, 1), -decision
+
+
+def _gap_frame(state: str):
+    """Monthly enrolment with baseline expected/gap, or an error dict."""
     series = get_monthly_enrolment_series(state=state)
 
     # Min data guard (monthly data)
@@ -58,23 +68,60 @@ def predict_gap_and_anomalies(state: str):
     X = df[["month_num", "lag_1", "lag_2", "roll_3"]]
     df["expected"] = baseline.predict(X)
     df["gap"] = df["total_enrolment"] - df["expected"]
+    return df
+
+
+def warm_gap_anomaly_model(force: bool = False):
+    """
+    Fit the global gap anomaly model ONCE on every state's gap history and
+    persist it, so requests only score. No-op if it already exists.
+    """
+    if not force and load_model("gap_anomaly") is not None:
+        return None
+
+    from backend.ml.data_loader import list_states
+    frames = [f for f in (_gap_frame(s) for s in list_states()) if isinstance(f, pd.DataFrame)]
+    if not frames:
+        return None
+    return train_gap_anomaly_model(pd.concat(frames, ignore_index=True))
+
+
+def gap_anomaly_frame(state: str):
+    """
+    Result rows of predict_gap_and_anomalies as a frame (or the error dict),
+    before serialization - lets the API stream them.
+    """
+    df = _gap_frame(state)
+    if not isinstance(df, pd.DataFrame):
+        return df
 
-    # anomaly model
+    # anomaly model (trained at startup / after ingest by warm_gap_anomaly_model;
+    # fitting here is only a last resort before the first warmup finishes, and
+    # is not saved: one state's history must not become the global model)
     gap_model = load_model("gap_anomaly")
     if gap_model is None:
-        gap_model = train_gap_anomaly_model(df)
+        gap_model = _fit_gap_anomaly_model(df)
 
-    df["anomaly_flag"] = gap_model.predict(df[["gap"]])
-    df["anomaly_score"] = -gap_model.decision_function(df[["gap"]])
+    df["anomaly_flag"], df["anomaly_score"] = score_gaps(gap_model, df[["gap"]])
 
     # Return all available months (not just last 30 days)
     out = df[["month", "total_enrolment", "expected", "gap", "anomaly_flag", "anomaly_score"]]
     out["month"] = out["month"].dt.date.astype(str)
-    out = out.rename(columns={"month": "date"})  # Keep API compatibility
+    return out.rename(columns={"month": "date"})  # Keep API compatibility
+
+
+def predict_gap_and_anomalies(state: str):
+    """
+    Predict gaps and anomalies using REAL monthly data from processed CSV.
+    NO PHANTOM MONTHS!
+    """
+    out = gap_anomaly_frame(state)
+    if not isinstance(out, pd.DataFrame):
+        return out
 
     return {
         "status": "success",
         "state": state,
-        "results": out.to_dict(orient="records"),
+        "results": frame_records(out),
         "data_source": "processed_monthly_csv"
     }
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 
@@ -5,13 +6,30 @@ from backend.ml.registry import save_model
 from backend.ml.data_loader import get_monthly_enrolment_series
 
 
-def make_monthly_features(df: pd.DataFrame):
-    """Create features for MONTHLY data."""
-    df = df.copy()
+def make_monthly_features(df: pd.DataFrame, column: str = "total_enrolment"):
+    """
+    Create features for MONTHLY data (df sorted by month), in place.
+    
+    Lags and the 3-month rolling mean come straight from the value array
+    (NaN where there isn't enough history, same as shift/rolling) instead of
+    a frame copy plus three intermediate Series. Callers pass a frame they
+    own (built from the series), so no copy is taken.
+    """
+    values = df[column].to_numpy(dtype=float)
+    n = len(values)
+
+    lag_1 = np.full(n, np.nan)
+    lag_1[1:] = values[:-1]  # Previous month
+    lag_2 = np.full(n, np.nan)
+    lag_2[2:] = values[:-2]  # 2 months ago
+    roll_3 = np.full(n, np.nan)
+    if n >= 3:
+        roll_3[2:] = np.convolve(values, np.ones(3) / 3, mode="valid")  # 3-month rolling avg
+
     df["month_num"] = df["month"].dt.month  # Month of year (1-12)
-    df["lag_1"] = df["total_enrolment"].shift(1)  # Previous month
-    df["lag_2"] = df["total_enrolment"].shift(2)  # 2 months ago
-    df["roll_3"] = df["total_enrolment"].rolling(3).mean()  # 3-month rolling avg
+    df["lag_1"] = lag_1
+    df["lag_2"] = lag_2
+    df["roll_3"] = roll_3
     return df
 
 
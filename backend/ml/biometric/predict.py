@@ -4,32 +4,33 @@ import pandas as pd
 from sklearn.ensemble import IsolationForest
 
 from backend.ml.registry import load_model, save_model
+from backend.common.responses import frame_records
 from backend.ml.data_loader import get_monthly_biometric_series
 from backend.ml.biometric.train import train_biometric_baseline_model
+from backend.ml.anomaly.train import make_monthly_features
+from backend.ml.anomaly.predict import score_gaps
 
 
 def build_monthly_features(df: pd.DataFrame):
-    """Build features for MONTHLY biometric data."""
-    df = df.copy()
-    df["month_num"] = df["month"].dt.month  # 1-12
-    df["lag_1"] = df["total_biometric"].shift(1)  # Previous month
-    df["lag_2"] = df["total_biometric"].shift(2)  # 2 months ago
-    df["roll_3"] = df["total_biometric"].rolling(3).mean()  # 3-month rolling avg
-    return df
+    """Build features for MONTHLY biometric data (same as training, in place)."""
+    return make_monthly_features(df, "total_biometric")
 
 
-def _train_bio_gap_anomaly(df: pd.DataFrame):
+def _fit_bio_gap_anomaly(df: pd.DataFrame):
+    """Fit the biometric gap anomaly model in memory (not persisted)."""
     model = IsolationForest(contamination=0.05, random_state=42)
     model.fit(df[["bio_gap"]])
+    return model
+
+
+def _train_bio_gap_anomaly(df: pd.DataFrame):
+    model = _fit_bio_gap_anomaly(df)
     save_model(model, "bio_gap_anomaly")
     return model
 
 
-def biometric_gap_anomaly(state: str):
-    """
-    Predict biometric gaps and anomalies using REAL monthly data from processed CSV.
-    NO PHANTOM MONTHS!
-    """
+def _bio_gap_frame(state: str):
+    """Monthly biometric volume with baseline expected/gap, or an error dict."""
     series = get_monthly_biometric_series(state=state)
 
     if series is None or len(series) < 4:
@@ -55,39 +56,85 @@ def biometric_gap_anomaly(state: str):
     X = df[["month_num", "lag_1", "lag_2", "roll_3"]]
     df["bio_expected"] = baseline.predict(X)
     df["bio_gap"] = df["total_biometric"] - df["bio_expected"]
+    return df
+
+
+def warm_bio_gap_anomaly_model(force: bool = False):
+    """
+    Fit the global biometric gap anomaly model ONCE on every state's gap
+    history and persist it, so requests only score. No-op if it exists.
+    """
+    if not force and load_model("bio_gap_anomaly") is not None:
+        return None
+
+    from backend.ml.data_loader import list_states
+    frames = [f for f in (_bio_gap_frame(s) for s in list_states()) if isinstance(f, pd.DataFrame)]
+    if not frames:
+        return None
+    return _train_bio_gap_anomaly(pd.concat(frames, ignore_index=True))
 
+
+def _biometric_gap_anomaly_df(state: str):
+    """Scored biometric gap frame (or an error dict), before serialization."""
+    df = _bio_gap_frame(state)
+    if not isinstance(df, pd.DataFrame):
+        return df
+
+    # Trained at startup / after ingest by warm_bio_gap_anomaly_model; fitting
+    # here is only a last resort before the first warmup finishes, and is not
+    # saved: one state's history must not become the global model
     gap_model = load_model("bio_gap_anomaly")
     if gap_model is None:
-        gap_model = _train_bio_gap_anomaly(df)
+        gap_model = _fit_bio_gap_anomaly(df)
+
+    df["anomaly_flag"], df["anomaly_score"] = score_gaps(gap_model, df[["bio_gap"]])
+    return df
 
-    df["anomaly_flag"] = gap_model.predict(df[["bio_gap"]])
-    df["anomaly_score"] = -gap_model.decision_function(df[["bio_gap"]])
+
+def biometric_gap_anomaly_frame(state: str):
+    """
+    Result rows of biometric_gap_anomaly as a frame (or the error dict),
+    before serialization - lets the API stream them.
+    """
+    df = _biometric_gap_anomaly_df(state)
+    if not isinstance(df, pd.DataFrame):
+        return df
 
     # Return all available months
     out = df[["month", "total_biometric", "bio_expected", "bio_gap", "anomaly_flag", "anomaly_score"]]
     out["month"] = out["month"].dt.date.astype(str)
-    out = out.rename(columns={"month": "date"})  # Keep API compatibility
+    return out.rename(columns={"month": "date"})  # Keep API compatibility
+
+
+def biometric_gap_anomaly(state: str):
+    """
+    Predict biometric gaps and anomalies using REAL monthly data from processed CSV.
+    NO PHANTOM MONTHS!
+    """
+    out = biometric_gap_anomaly_frame(state)
+    if not isinstance(out, pd.DataFrame):
+        return out
 
     return {
         "status": "success",
         "state": state,
-        "results": out.to_dict(orient="records"),
+        "results": frame_records(out),
         "data_source": "processed_monthly_csv"
     }
 
 
 def biometric_risk_score(state: str):
-    out = biometric_gap_anomaly(state)
-    if out.get("status") != "success":
-        return out
+    # Reduce the scored frame directly (no records -> DataFrame round trip)
+    df = _biometric_gap_anomaly_df(state)
+    if not isinstance(df, pd.DataFrame):
+        return df
 
-    df = pd.DataFrame(out["results"])
-    df["bio_gap"] = pd.to_numeric(df["bio_gap"], errors="coerce").fillna(0)
-    df["anomaly_score"] = pd.to_numeric(df["anomaly_score"], errors="coerce").fillna(0)
+    bio_gap = np.nan_to_num(df["bio_gap"].to_numpy(dtype=float))
+    anomaly_score = np.nan_to_num(df["anomaly_score"].to_numpy(dtype=float))
 
-    gap_abs_mean = float(df["bio_gap"].abs().mean())
-    neg_ratio = float((df["bio_gap"] < 0).mean())
-    sev = float(df["anomaly_score"].mean())
+    gap_abs_mean = float(np.abs(bio_gap).mean())
+    neg_ratio = float((bio_gap < 0).mean())
+    sev = float(anomaly_score.mean())
 
     risk = 0.5 * np.log1p(gap_abs_mean) + 0.3 * (neg_ratio * 10) + 0.2 * sev
 
@@ -5,6 +5,7 @@ from backend.common.state_resolver import resolve_state
 from backend.common.key_utils import slugify_key
 from backend.ml.data_loader import get_monthly_biometric_series
 from backend.ml.registry import save_model
+from backend.ml.anomaly.train import make_monthly_features
 
 
 def train_biometric_baseline_model(state: str = None):
@@ -29,12 +30,7 @@ def train_biometric_baseline_model(state: str = None):
     df = df.sort_values("month").reset_index(drop=True)
 
     # Feature engineering for MONTHLY data
-    df["month_num"] = df["month"].dt.month  # Month of year (1-12)
-    df["lag_1"] = df["total_biometric"].shift(1)  # Previous month
-    df["lag_2"] = df["total_biometric"].shift(2)  # 2 months ago
-    df["roll_3"] = df["total_biometric"].rolling(3).mean()  # 3-month rolling avg
-
-    df = df.dropna()
+    df = make_monthly_features(df, "total_biometric").dropna()
     if df.empty or len(df) < 3:
         return {"status": "error", "message": "Not enough biometric data after features"}
 
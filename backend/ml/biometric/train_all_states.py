@@ -16,7 +16,7 @@ from sklearn.metrics import mean_absolute_error, r2_score
 import pickle
 from datetime import datetime
 
-from backend.ml.data_loader import load_processed_data
+from backend.ml.data_loader import load_processed_data, filter_state
 from backend.ml.registry import save_model
 from backend.common.key_utils import slugify_key
 
@@ -42,7 +42,7 @@ def train_biometric_baseline_model(state: str = None, save: bool = True):
     
     # Filter by state if specified
     if state:
-        df = df[df['state'].str.lower() == state.lower()]
+        df = filter_state(df, state)
         if df.empty:
             return {
                 "status": "error",
@@ -1,116 +1,89 @@
 from sqlalchemy import func
 from backend.db.session import SessionLocal
 from backend.db.models import UIDAIRecord
+from backend.common.key_utils import clean_name
+from backend.common.state_resolver import canonical_state_name
 
 
-def get_total_enrolment_series(state: str = None, district: str = None):
-    session = SessionLocal()
-        # ✅ normalize filters (PERMANENT)
-    if state:
-        state = " ".join(str(state).strip().split()).title()
-    if district:
-        district = " ".join(str(district).strip().split()).title()
-
-
-    q = (
-        session.query(
-            UIDAIRecord.date.label("date"),
-            func.sum(UIDAIRecord.metric_value).label("total_enrolment")
-        )
-        .filter(
-            UIDAIRecord.dataset_type == "ENROLMENT",
-            UIDAIRecord.metric_name.like("age_%")
+def _metric_series(dataset_type: str, metric_prefix: str, label: str,
+                   state: str = None, district: str = None):
+    """
+    Monthly SUM(metric_value) for one dataset_type / metric-name prefix.
+    Filters lead with the ix_uidai_dtype_state_district_date columns, so the
+    planner can answer it from the (covering) index instead of a table scan.
+    """
+    # Stored values were canonicalized at ingest: match them exactly
+    state = canonical_state_name(state) if state else state
+    district = clean_name(district) if district else district
+
+    with SessionLocal() as session:
+        q = (
+            session.query(
+                UIDAIRecord.date.label("date"),
+                func.sum(UIDAIRecord.metric_value).label("total")
+            )
+            .filter(
+                UIDAIRecord.dataset_type == dataset_type,
+                UIDAIRecord.metric_name.like(f"{metric_prefix}%")
+            )
         )
-    )
 
-    if state:
-        q = q.filter(UIDAIRecord.state == state)
-    if district:
-        q = q.filter(UIDAIRecord.district == district)
+        if state:
+            q = q.filter(UIDAIRecord.state == state)
+        if district:
+            q = q.filter(UIDAIRecord.district == district)
 
-    rows = (
-        q.group_by(UIDAIRecord.date)
-         .order_by(UIDAIRecord.date.asc())
-         .all()
-    )
+        rows = (
+            q.group_by(UIDAIRecord.date)
+             .order_by(UIDAIRecord.date.asc())
+             .all()
+        )
 
-    session.close()
-    return [{"date": r.date, "total_enrolment": int(r.total_enrolment)} for r in rows]
+    return [{"date": r.date, label: int(r.total)} for r in rows]
 
 
-def get_total_biometric_series(state: str = None, district: str = None):
+def get_total_enrolment_series(state: str = None, district: str = None):
     """
-    Bio total = sum(metrics where metric_name like 'bio_%'
+    Enrolment total = sum(metrics where metric_name like 'age_%')
     """
-    session = SessionLocal()
-        # ✅ normalize filters (PERMANENT)
-    if state:
-        state = " ".join(str(state).strip().split()).title()
-    if district:
-        district = " ".join(str(district).strip().split()).title()
-
-
-    q = (
-        session.query(
-            UIDAIRecord.date.label("date"),
-            func.sum(UIDAIRecord.metric_value).label("total_biometric")
-        )
-        .filter(
-            UIDAIRecord.dataset_type == "BIOMETRIC",
-            UIDAIRecord.metric_name.like("bio_%")
-        )
-    )
-
-    if state:
-        q = q.filter(UIDAIRecord.state == state)
-    if district:
-        q = q.filter(UIDAIRecord.district == district)
+    return _metric_series("ENROLMENT", "age_", "total_enrolment", state, district)
 
-    rows = (
-        q.group_by(UIDAIRecord.date)
-         .order_by(UIDAIRecord.date.asc())
-         .all()
-    )
 
-    session.close()
-    return [{"date": r.date, "total_biometric": int(r.total_biometric)} for r in rows]
+def get_total_biometric_series(state: str = None, district: str = None):
+    """
+    Bio total = sum(metrics where metric_name like 'bio_%')
+    """
+    return _metric_series("BIOMETRIC", "bio_", "total_biometric", state, district)
 
 
 def list_districts(state: str, limit: int = 300):
-    session = SessionLocal()
-
-    rows = (
-        session.query(UIDAIRecord.district, func.count(UIDAIRecord.id).label("cnt"))
-        .filter(UIDAIRecord.state == state)
-        .group_by(UIDAIRecord.district)
-        .order_by(func.count(UIDAIRecord.id).desc())
-        .limit(limit)
-        .all()
-    )
-
-    session.close()
-    return [" ".join(str(r[0]).strip().split()).title() for r in rows if r[0]]
+    with SessionLocal() as session:
+        rows = (
+            session.query(UIDAIRecord.district, func.count(UIDAIRecord.id).label("cnt"))
+            .filter(UIDAIRecord.state == state)
+            .group_by(UIDAIRecord.district)
+            .order_by(func.count(UIDAIRecord.id).desc())
+            .limit(limit)
+            .all()
+        )
 
-from sqlalchemy import func
-from backend.db.session import SessionLocal
-from backend.db.models import UIDAIRecord
+    # Districts are stored cleaned (see ingestion_service.save_to_db)
+    return [r[0] for r in rows if r[0]]
 
 
 def list_biometric_districts(state: str, limit: int = 300):
-    session = SessionLocal()
-
-    rows = (
-        session.query(UIDAIRecord.district, func.count(UIDAIRecord.id).label("cnt"))
-        .filter(
-            UIDAIRecord.dataset_type == "BIOMETRIC",
-            UIDAIRecord.state == state,
-            UIDAIRecord.district != None
+    with SessionLocal() as session:
+        rows = (
+            session.query(UIDAIRecord.district, func.count(UIDAIRecord.id).label("cnt"))
+            .filter(
+                UIDAIRecord.dataset_type == "BIOMETRIC",
+                UIDAIRecord.state == state,
+                UIDAIRecord.district != None
+            )
+            .group_by(UIDAIRecord.district)
+            .order_by(func.count(UIDAIRecord.id).desc())
+            .limit(limit)
+            .all()
         )
-        .group_by(UIDAIRecord.district)
-        .order_by(func.count(UIDAIRecord.id).desc())
-        .limit(limit)
-        .all()
-    )
 
-    session.close()
     return [r[0] for r in rows if r[0]]
@@ -3,10 +3,14 @@ Data loader for processed monthly Aadhaar data.
 Replaces CSV reading with PostgreSQL database query.
 "Zero File Dependency" version for Render.
 """
+import json
+import os
+import tempfile
+import numpy as np
 import pandas as pd
 import logging
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, NamedTuple
 from datetime import datetime, timedelta
 
 from backend.db.session import SessionLocal, engine
@@ -14,32 +18,179 @@ from backend.db.models import UIDAIRecord
 
 logger = logging.getLogger(__name__)
 
+# Optional: pyarrow for the on-disk parquet snapshot of the pivoted frame
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Snapshot of the normalized wide frame, with the DB fingerprint it was built
+# from stored in the parquet schema metadata (one file, replaced atomically).
+# A fresh process (restart, extra worker) whose DB fingerprint matches reads
+# this instead of re-fetching every long row and re-pivoting.
+# UIDAI_CACHE_DIR points it outside the source tree (default is git-ignored).
+SNAPSHOT_DIR = Path(os.getenv(
+    "UIDAI_CACHE_DIR", Path(__file__).resolve().parents[1] / "data" / "processed"
+))
+SNAPSHOT_PATH = SNAPSHOT_DIR / "processed_monthly.parquet"
+_SNAPSHOT_FINGERPRINT_KEY = b"uidai_fingerprint"
+
+class _LoadedFrame(NamedTuple):
+    """One load of the processed frame plus everything derived from it.
+    Published as a single object so readers never pair a new frame with an
+    old index (routes run concurrently on the threadpool)."""
+    data: pd.DataFrame
+    state_index: Dict       # state_lc -> row positions in data (see load_state_data)
+    districts_by_state: Dict  # state_lc -> sorted district names (see list_districts)
+    loaded_at: datetime
+    fingerprint: Optional[tuple]  # (row count, max id, max created_at) of uidai_records
+
+
 # In-memory cache to reduce DB hits
 _DB_CACHE = {
-    "data": None,
-    "loaded_at": None,
+    "loaded": None,       # _LoadedFrame, replaced in ONE assignment per reload
+    "checked_at": None,   # last time the DB fingerprint was verified
     "ttl_minutes": 5  # Cache expires after 5 minutes
 }
 
-def load_processed_data(validate: bool = True, force_reload: bool = False) -> pd.DataFrame:
+_EMPTY_COLUMNS = [
+    "state", "district", "month",
+    "total_enrolments", "total_demo_updates", "total_bio_updates"
+]
+
+# Metric columns of the wide frame
+_METRIC_COLUMNS = ("total_enrolments", "total_demo_updates", "total_bio_updates")
+
+_FINGERPRINT_QUERY = "SELECT COUNT(*), MAX(id), MAX(created_at) FROM uidai_records"
+
+
+def _table_fingerprint():
+    """Cheap change detector for uidai_records (None if it can't be read)."""
+    try:
+        with engine.connect() as conn:
+            return tuple(conn.exec_driver_sql(_FINGERPRINT_QUERY).one())
+    except Exception as e:
+        logger.warning(f"⚠️ Could not fingerprint uidai_records: {e}")
+        return None
+
+
+def _fingerprint_key(fingerprint) -> bytes:
+    return json.dumps([str(v) for v in fingerprint]).encode()
+
+
+def _snapshot_fingerprint(schema) -> Optional[bytes]:
+    return (schema.metadata or {}).get(_SNAPSHOT_FINGERPRINT_KEY)
+
+
+def _read_snapshot(fingerprint) -> Optional[pd.DataFrame]:
+    """Parquet snapshot if it was built from this exact table state, else None."""
+    if not PYARROW_AVAILABLE or fingerprint is None or not SNAPSHOT_PATH.exists():
+        return None
+    expected = _fingerprint_key(fingerprint)
+    try:
+        # Cheap footer-only check first, then re-check on the table actually
+        # read (the file may have been replaced in between)
+        if _snapshot_fingerprint(pq.read_schema(SNAPSHOT_PATH)) != expected:
+            return None
+        table = pq.read_table(SNAPSHOT_PATH)
+        if _snapshot_fingerprint(table.schema) != expected:
+            return None
+        return table.to_pandas()
+    except Exception as e:
+        logger.warning(f"⚠️ Ignoring unreadable parquet snapshot: {e}")
+        return None
+
+
+def _write_snapshot(df: pd.DataFrame, fingerprint) -> None:
+    if not PYARROW_AVAILABLE or fingerprint is None:
+        return
+    tmp_path = None
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            _SNAPSHOT_FINGERPRINT_KEY: _fingerprint_key(fingerprint),
+        })
+        # Each writer (worker) gets its own temp file; os.replace swaps the
+        # complete file in atomically, so readers never see a partial one
+        fd, tmp_path = tempfile.mkstemp(dir=SNAPSHOT_DIR, suffix=".parquet.tmp")
+        os.close(fd)
+        pq.write_table(table, tmp_path, compression="snappy")
+        os.replace(tmp_path, SNAPSHOT_PATH)
+        tmp_path = None
+    except Exception as e:
+        logger.warning(f"⚠️ Could not write parquet snapshot: {e}")
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _store_in_cache(df_wide: pd.DataFrame, fingerprint) -> _LoadedFrame:
+    groups = df_wide.groupby('state_lc', observed=True)
+    loaded = _LoadedFrame(
+        data=df_wide,
+        state_index=groups.indices,
+        districts_by_state={
+            state_lc: sorted(districts.tolist())
+            for state_lc, districts in groups['district'].unique().items()
+        },
+        loaded_at=datetime.now(),
+        fingerprint=fingerprint,
+    )
+    _DB_CACHE["loaded"] = loaded  # single reference swap
+    _DB_CACHE["checked_at"] = loaded.loaded_at
+    return loaded
+
+
+def load_processed_data(validate: bool = True, force_reload: bool = False,
+                        copy: bool = True) -> pd.DataFrame:
     """
     Load data from PostgreSQL database and pivot to expected format.
     
     Args:
         validate: If True, run validation checks (kept for compatibility)
         force_reload: Force reload from DB (bypass cache)
+        copy: Return a copy of the cached frame. Read-only callers can pass
+              False to skip duplicating the whole frame (do NOT mutate it).
     
     Returns:
         DataFrame with columns: state, district, month, total_enrolments, 
                                 total_demo_updates, total_bio_updates
     """
-    global _DB_CACHE
-    
-    # Check cache
-    if not force_reload and _DB_CACHE["data"] is not None and _DB_CACHE["loaded_at"] is not None:
-        cache_age = datetime.now() - _DB_CACHE["loaded_at"]
+    loaded = _load_frame(force_reload)
+    if loaded is None:
+        # Return empty DataFrame with expected columns to prevent crashes
+        return pd.DataFrame(columns=_EMPTY_COLUMNS)
+    return loaded.data.copy() if copy else loaded.data
+
+
+def _load_frame(force_reload: bool = False) -> Optional[_LoadedFrame]:
+    """Current _LoadedFrame, reloading it if stale (None if there's no data)."""
+    # Check cache (one read of the published load)
+    loaded = _DB_CACHE["loaded"]
+    fingerprint = None
+    if not force_reload and loaded is not None and _DB_CACHE["checked_at"] is not None:
+        cache_age = datetime.now() - _DB_CACHE["checked_at"]
         if cache_age < timedelta(minutes=_DB_CACHE["ttl_minutes"]):
-            return _DB_CACHE["data"].copy()
+            return loaded
+        
+        # TTL expired: only re-read + re-pivot the whole table if it actually changed
+        fingerprint = _table_fingerprint()
+        if fingerprint is not None and fingerprint == loaded.fingerprint:
+            _DB_CACHE["checked_at"] = datetime.now()
+            return loaded
+    
+    if fingerprint is None:
+        fingerprint = _table_fingerprint()
+    
+    # Same table state as the last snapshot: skip the full fetch + pivot
+    snapshot = None if force_reload else _read_snapshot(fingerprint)
+    if snapshot is not None:
+        logger.info(f"✅ Loaded {len(snapshot)} rows from parquet snapshot.")
+        return _store_in_cache(snapshot, fingerprint)
     
     logger.info("📡 Fetching data from PostgreSQL database...")
     
@@ -48,20 +199,14 @@ def load_processed_data(validate: bool = True, force_reload: bool = False) -> pd
         # We fetch raw records: date, state, district, metric_name, metric_value
         query = "SELECT date as month, state, district, metric_name, metric_value FROM uidai_records"
         
-        # Use pandas read_sql with the engine
-        df_long = pd.read_sql(query, engine)
+        # Use pandas read_sql with the engine; month is parsed while the
+        # result set is materialized instead of in a second pass afterwards
+        df_long = pd.read_sql(query, engine, parse_dates=["month"])
         
         if df_long.empty:
             logger.warning("⚠️ Database return empty DataFrame! Database might be empty.")
-            # Return empty DataFrame with expected columns to prevent crashes
-            return pd.DataFrame(columns=[
-                "state", "district", "month", 
-                "total_enrolments", "total_demo_updates", "total_bio_updates"
-            ])
-
-        # Convert date to datetime
-        df_long['month'] = pd.to_datetime(df_long['month'])
-        
+            return None
+
         # Pivot the table: Long -> Wide
         # Index: month, state, district
         # Columns: metric_name
@@ -75,19 +220,16 @@ def load_processed_data(validate: bool = True, force_reload: bool = False) -> pd
         ).reset_index()
         
         # Ensure we have all expected columns
-        expected_cols = ["total_enrolments", "total_demo_updates", "total_bio_updates"]
+        expected_cols = list(_METRIC_COLUMNS)
         for col in expected_cols:
             if col not in df_wide.columns:
                 df_wide[col] = 0
                 
         # Rename columns to match exact expected schema if needed (pivot uses metric names as cols)
-        # Ensure types
-        df_wide['total_enrolments'] = df_wide['total_enrolments'].astype(int)
-        df_wide['total_demo_updates'] = df_wide['total_demo_updates'].astype(int)
-        df_wide['total_bio_updates'] = df_wide['total_bio_updates'].astype(int)
-        
-        # Normalize exact format as original (sort by state, district, month)
-        df_wide = df_wide.sort_values(['state', 'district', 'month']).reset_index(drop=True)
+        # Ensure types: monthly per-district counts fit comfortably in int32,
+        # half the bytes of int64 for the cached frame and every scan over it
+        metric_dtypes = {col: 'int32' for col in expected_cols}
+        df_wide = df_wide.astype(metric_dtypes)
         
         # --- FIX: Normalize district names ---
         # Import comprehensive district normalization map covering all states
@@ -99,45 +241,116 @@ def load_processed_data(validate: bool = True, force_reload: bool = False) -> pd
         # Re-aggregate to merge data for normalized districts (e.g. if Jan data was split)
         df_wide = df_wide.groupby(['state', 'district', 'month'], as_index=False)[
             ["total_enrolments", "total_demo_updates", "total_bio_updates"]
-        ].sum()
+        ].sum().astype(metric_dtypes)
         # -------------------------------------
         
-        logger.info(f"✅ Loaded {len(df_wide)} rows from database (after normalization).")
+        # ~36 distinct states over N rows: categorical turns state filters into code compares
+        df_wide['state'] = df_wide['state'].astype('category')
+        # Lowercased key precomputed once per load for case-insensitive filters (see filter_state)
+        df_wide['state_lc'] = df_wide['state'].str.lower().astype('category')
+        
+        # Sort ONCE here: every state's rows are then one contiguous block ordered
+        # by (district, month), so per-request code never has to re-sort
+        df_wide = df_wide.sort_values(['state_lc', 'district', 'month'], kind='stable', ignore_index=True)
         
-        # Update cache
-        _DB_CACHE["data"] = df_wide
-        _DB_CACHE["loaded_at"] = datetime.now()
+        logger.info(f"✅ Loaded {len(df_wide)} rows from database (after normalization).")
         
-        return df_wide.copy()
+        # Update cache (+ on-disk snapshot for the next cold start)
+        loaded = _store_in_cache(df_wide, fingerprint)
+        _write_snapshot(df_wide, fingerprint)
+        return loaded
 
     except Exception as e:
         logger.error(f"❌ Failed to load data from database: {e}")
-        # Return empty DF on error to avoid critical crash
-        return pd.DataFrame(columns=[
-            "state", "district", "month", 
-            "total_enrolments", "total_demo_updates", "total_bio_updates"
-        ])
+        # Empty result on error to avoid critical crash
+        return None
 
 
-def get_monthly_enrolment_series(state: Optional[str] = None, 
-                                  district: Optional[str] = None) -> List[Dict]:
-    """Get monthly enrolment time series for a state/district."""
-    df = load_processed_data(validate=False)
+def data_version():
+    """
+    Timestamp of the currently cached frame (None if nothing is cached).
+    Changes whenever the data is reloaded, so it can key derived caches.
+    """
+    loaded = _DB_CACHE["loaded"]
+    return loaded.loaded_at if loaded is not None else None
+
+
+def load_state_data(state: str) -> pd.DataFrame:
+    """
+    Rows for one state (case-insensitive) from the cached frame.
     
-    if df.empty:
-        return []
+    Uses the per-state row positions built once per load, so this is a
+    plain gather (take) with no string ops or full-column compare. Rows come
+    back sorted by (district, month), each district contiguous. The result
+    is a new frame and is safe to mutate.
+    """
+    # Frame and positions come from the same _LoadedFrame (no reload in between)
+    loaded = _load_frame()
+    if loaded is None:
+        return pd.DataFrame(columns=_EMPTY_COLUMNS)
+    df = loaded.data
+    positions = loaded.state_index.get(state.lower())
+    if positions is None:
+        return df.iloc[0:0].copy()
+    return df.take(positions)
+
+
+def filter_state(df: pd.DataFrame, state: str) -> pd.DataFrame:
+    """
+    Case-insensitive state filter.
+    
+    Frames from load_processed_data carry a precomputed categorical `state_lc`
+    column, so this is a single code compare. Otherwise, with a categorical
+    `state` only the categories are lowercased (one per state), and rows are
+    matched on their integer codes instead of lowercasing the whole column.
+    """
+    target = state.lower()
+    if 'state_lc' in df.columns:
+        return df[df['state_lc'].eq(target)]
+    col = df['state']
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        # Compare integer codes directly against the matching category positions
+        cats = col.cat.categories
+        codes = np.flatnonzero(cats.str.lower() == target)
+        return df[np.isin(col.cat.codes.to_numpy(), codes)]
+    return df[col.str.lower().eq(target)]
 
-    # Normalize filters
+
+def _state_filter(state: str) -> str:
+    from backend.common.state_resolver import canonical_state_name
+    return canonical_state_name(state)
+
+
+def _state_district_rows(state: Optional[str], district: Optional[str]) -> pd.DataFrame:
+    """
+    Rows for an optional state/district filter. The state is a lookup in the
+    per-state row index (no full-frame mask); the district mask then only
+    scans that state's rows.
+    """
     if state:
-        from backend.common.state_resolver import normalize_state_name
-        normalized = normalize_state_name(state)
-        state_filter = normalized if normalized else " ".join(str(state).strip().split()).title()
-        df = df[df['state'] == state_filter]
+        df = load_state_data(_state_filter(state))
+    else:
+        df = load_processed_data(validate=False, copy=False)
     
-    if district:
-        district = " ".join(str(district).strip().split()).title()
-        df = df[df['district'] == district]
+    if district and not df.empty:
+        from backend.common.key_utils import clean_name
+        df = df[df['district'] == clean_name(district)]
     
+    return df
+
+
+def get_monthly_enrolment_series(state: Optional[str] = None, 
+                                  district: Optional[str] = None) -> List[Dict]:
+    """
+    Get monthly enrolment time series for a state/district.
+    
+    `month` is returned as a pandas Timestamp (parsed once in
+    load_processed_data), so callers never need to re-run pd.to_datetime.
+    
+    This and the other read-only helpers below work on the shared cached
+    frame (copy=False) - they only filter/aggregate, never mutate it.
+    """
+    df = _state_district_rows(state, district)
     if df.empty:
         return []
     
@@ -154,21 +367,7 @@ def get_monthly_enrolment_series(state: Optional[str] = None,
 def get_monthly_biometric_series(state: Optional[str] = None,
                                   district: Optional[str] = None) -> List[Dict]:
     """Get monthly biometric update time series for a state/district."""
-    df = load_processed_data(validate=False)
-    
-    if df.empty:
-        return []
-        
-    if state:
-        from backend.common.state_resolver import normalize_state_name
-        normalized = normalize_state_name(state)
-        state_filter = normalized if normalized else " ".join(str(state).strip().split()).title()
-        df = df[df['state'] == state_filter]
-    
-    if district:
-        district = " ".join(str(district).strip().split()).title()
-        df = df[df['district'] == district]
-    
+    df = _state_district_rows(state, district)
     if df.empty:
         return []
     
@@ -184,21 +383,7 @@ def get_monthly_biometric_series(state: Optional[str] = None,
 def get_monthly_demographic_series(state: Optional[str] = None,
                                     district: Optional[str] = None) -> List[Dict]:
     """Get monthly demographic update time series for a state/district."""
-    df = load_processed_data(validate=False)
-    
-    if df.empty:
-        return []
-
-    if state:
-        from backend.common.state_resolver import normalize_state_name
-        normalized = normalize_state_name(state)
-        state_filter = normalized if normalized else " ".join(str(state).strip().split()).title()
-        df = df[df['state'] == state_filter]
-    
-    if district:
-        district = " ".join(str(district).strip().split()).title()
-        df = df[df['district'] == district]
-    
+    df = _state_district_rows(state, district)
     if df.empty:
         return []
     
@@ -213,28 +398,25 @@ def get_monthly_demographic_series(state: Optional[str] = None,
 
 def list_states() -> List[str]:
     """Get list of unique states in processed data."""
-    df = load_processed_data(validate=False)
+    df = load_processed_data(validate=False, copy=False)
     if df.empty:
         return []
     return sorted(df['state'].unique().tolist())
 
 
 def list_districts(state: str) -> List[str]:
-    """Get list of unique districts for a state."""
-    df = load_processed_data(validate=False)
-    
-    from backend.common.state_resolver import normalize_state_name
-    normalized = normalize_state_name(state)
-    state_filter = normalized if normalized else " ".join(str(state).strip().split()).title()
-    df = df[df['state'] == state_filter]
-    
-    return sorted(df['district'].unique().tolist())
+    """Get list of unique districts for a state (precomputed per load)."""
+    loaded = _load_frame()  # refreshes the cache if stale
+    if loaded is None:
+        return []
+    return list(loaded.districts_by_state.get(_state_filter(state).lower(), []))
 
 
 def get_last_data_date() -> str:
     """Get the last (most recent) date in the data."""
-    df = load_processed_data(validate=False)
+    df = load_processed_data(validate=False, copy=False)
     if not df.empty and 'month' in df.columns:
-        max_date = pd.to_datetime(df['month']).max()
+        # month is already datetime64 (parsed in load_processed_data)
+        max_date = df['month'].max()
         return max_date.strftime('%Y-%m-%d')
     return datetime.now().strftime('%Y-%m-%d')
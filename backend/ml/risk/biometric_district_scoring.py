@@ -10,6 +10,7 @@ from backend.common.state_resolver import resolve_state
 from backend.common.key_utils import slugify_key
 from backend.ml.registry import load_model
 from backend.ml.data_loader import get_monthly_biometric_series
+from backend.ml.risk.shared_analysis import expand_trend_values
 
 
 def compute_biometric_district_risk(state: str, district: str) -> Dict:
@@ -95,18 +96,7 @@ def compute_biometric_district_risk(state: str, district: str) -> Dict:
     raw_risk = np.log1p(gap_abs_mean) + (neg_ratio * 10) + (abs(gap_trend) / 1000)
     
     # Get trend data (all available months, padded to 30 values)
-    trend_data = df["total_biometric"].tolist()
-    if len(trend_data) > 30:
-        trend_data = trend_data[-30:]
-    elif len(trend_data) < 30:
-        # Pad by repeating values
-        days_per_month = 30 // len(trend_data)
-        remainder = 30 % len(trend_data)
-        daily_trend = []
-        for i, monthly_val in enumerate(trend_data):
-            days_for_this_month = days_per_month + (1 if i < remainder else 0)
-            daily_trend.extend([monthly_val] * days_for_this_month)
-        trend_data = daily_trend[:30]
+    trend_data = expand_trend_values(df["total_biometric"].to_numpy()).tolist()
     
     return {
         "status": "success",
@@ -9,19 +9,27 @@ import pandas as pd
 import numpy as np
 import json
 import logging
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
+from functools import lru_cache
 
 # Lazy imports to avoid cold-start issues
 _sklearn_loaded = False
 _model_cache = {}
+# Guards _model_cache: the startup warm-up thread writes it while request
+# threads read it and train into it
+_MODEL_CACHE_LOCK = threading.Lock()
 
 logger = logging.getLogger(__name__)
 
 # Model storage path - backend/ml/risk -> backend -> data/models
 MODEL_DIR = Path(__file__).parent.parent / "data" / "models"
 
+# Model input features (column order of the feature matrix)
+FEATURE_COLS = ['bio_rate', 'bio_trend', 'bio_volatility', 'deviation', 'enrol_bio_ratio']
+
 
 def _ensure_sklearn():
     """Lazy load sklearn to improve cold-start performance."""
@@ -36,7 +44,32 @@ def _ensure_sklearn():
     return _sklearn_loaded
 
 
-def engineer_features(state_df: pd.DataFrame) -> pd.DataFrame:
+def _series_stats(values: np.ndarray) -> Tuple[float, float, float, float]:
+    """
+    Sum, mean, sample std and OLS slope of a monthly series in one fused pass.
+    
+    The centred deviations are computed once and shared by the std and the
+    slope, replacing separate mean/std/sum reductions plus np.polyfit.
+    Std is NaN below 2 points (pandas semantics); slope is 0 below 3 points.
+    """
+    n = values.size
+    if n == 0:
+        return 0.0, 0.0, np.nan, 0.0
+    
+    total = float(values.sum())
+    mean = total / n
+    centred = values - mean
+    std = float(np.sqrt(centred @ centred / (n - 1))) if n > 1 else np.nan
+    
+    slope = 0.0
+    if n >= 3:
+        x_centred = np.arange(n) - (n - 1) / 2.0
+        slope = float(x_centred @ centred / (x_centred @ x_centred))
+    
+    return total, mean, std, slope
+
+
+def engineer_features(state_df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
     """
     Engineer features for demographic risk model from state data.
     
@@ -51,13 +84,11 @@ def engineer_features(state_df: pd.DataFrame) -> pd.DataFrame:
         state_df: DataFrame filtered for a specific state
         
     Returns:
-        DataFrame with engineered features per district
+        Tuple of (DataFrame with engineered features per district,
+        C-contiguous float64 feature matrix in FEATURE_COLS order with NaNs zeroed)
     """
     if state_df.empty:
-        return pd.DataFrame(columns=[
-            'district', 'bio_rate', 'bio_trend', 'bio_volatility', 
-            'deviation', 'enrol_bio_ratio'
-        ])
+        return pd.DataFrame(columns=['district'] + FEATURE_COLS), np.empty((0, len(FEATURE_COLS)))
     
     # Ensure required columns exist
     required_cols = ['district', 'month', 'total_bio_updates', 'total_enrolments']
@@ -73,11 +104,11 @@ def engineer_features(state_df: pd.DataFrame) -> pd.DataFrame:
     if state_avg_bio == 0:
         state_avg_bio = 1  # Prevent division by zero
     
-    features_list = []
+    districts = []
+    bio_rates, bio_trends, bio_volatilities, deviations, enrol_bio_ratios = [], [], [], [], []
     
-    for district in state_df['district'].unique():
-        district_df = state_df[state_df['district'] == district].copy()
-        
+    # One hash partition of the state frame instead of a boolean mask per district
+    for district, district_df in state_df.groupby('district', sort=False, observed=True):
         if district_df.empty:
             continue
         
@@ -88,23 +119,14 @@ def engineer_features(state_df: pd.DataFrame) -> pd.DataFrame:
         monthly_bio = district_df.groupby('month')['total_bio_updates'].sum()
         monthly_enrol = district_df.groupby('month')['total_enrolments'].sum()
         
-        # Feature 1: Bio rate (average monthly bio updates)
-        bio_rate = monthly_bio.mean() if len(monthly_bio) > 0 else 0
-        
-        # Feature 2: Bio trend (slope of linear regression)
-        if len(monthly_bio) >= 3:
-            x = np.arange(len(monthly_bio))
-            try:
-                slope, _ = np.polyfit(x, monthly_bio.values, 1)
-                bio_trend = slope
-            except:
-                bio_trend = 0
-        else:
-            bio_trend = 0
+        # Features 1 & 2: Bio rate (average monthly bio updates) and bio trend
+        # (slope of linear regression), fused with the std/sum reductions
+        total_bio, bio_rate, bio_std, bio_trend = _series_stats(
+            monthly_bio.to_numpy(dtype=np.float64)
+        )
+        bio_mean = bio_rate
         
         # Feature 3: Bio volatility (coefficient of variation)
-        bio_mean = monthly_bio.mean()
-        bio_std = monthly_bio.std()
         bio_volatility = (bio_std / bio_mean) if bio_mean > 0 else 0
         
         # Feature 4: Deviation from state average (percentage)
@@ -112,19 +134,24 @@ def engineer_features(state_df: pd.DataFrame) -> pd.DataFrame:
         
         # Feature 5: Enrolment to bio ratio
         total_enrol = monthly_enrol.sum()
-        total_bio = monthly_bio.sum()
         enrol_bio_ratio = (total_enrol / total_bio) if total_bio > 0 else 0
         
-        features_list.append({
-            'district': district,
-            'bio_rate': float(bio_rate),
-            'bio_trend': float(bio_trend),
-            'bio_volatility': float(bio_volatility),
-            'deviation': float(deviation),
-            'enrol_bio_ratio': float(enrol_bio_ratio)
-        })
-    
-    return pd.DataFrame(features_list)
+        districts.append(district)
+        bio_rates.append(bio_rate)
+        bio_trends.append(bio_trend)
+        bio_volatilities.append(bio_volatility)
+        deviations.append(deviation)
+        enrol_bio_ratios.append(enrol_bio_ratio)
+    
+    # Assemble each feature column once as float64, then stack into the model matrix
+    columns = [
+        np.asarray(values, dtype=np.float64)
+        for values in (bio_rates, bio_trends, bio_volatilities, deviations, enrol_bio_ratios)
+    ]
+    features_df = pd.DataFrame({'district': districts, **dict(zip(FEATURE_COLS, columns))})
+    X = np.nan_to_num(np.column_stack(columns), nan=0.0, copy=False)
+    
+    return features_df, X
 
 
 def train_demographic_risk_model(state: str = "All") -> Dict:
@@ -137,37 +164,30 @@ def train_demographic_risk_model(state: str = "All") -> Dict:
     Returns:
         Dictionary with training metadata
     """
-    from backend.ml.data_loader import load_processed_data
+    from backend.ml.data_loader import load_processed_data, load_state_data
     
     logger.info(f"[Demographic Risk Model] Training for state: {state}")
     
-    # Load data from database
+    # Load data from database (single state via the precomputed row index)
     try:
-        df = load_processed_data(validate=False)
+        if state and state.lower() != "all":
+            state_df = load_state_data(state)
+        else:
+            state_df = load_processed_data(validate=False, copy=False)
     except Exception as e:
         raise ValueError(f"Failed to load data: {e}")
     
-    if df.empty:
-        raise ValueError("No data available for training")
-    
-    # Filter by state if specified
-    if state and state.lower() != "all":
-        state_df = df[df['state'].str.lower() == state.lower()].copy()
-        if state_df.empty:
+    if state_df.empty:
+        if state and state.lower() != "all":
             raise ValueError(f"No data found for state: {state}")
-    else:
-        state_df = df.copy()
+        raise ValueError("No data available for training")
     
-    # Engineer features
-    features_df = engineer_features(state_df)
+    # Engineer features (feature matrix comes back ready for sklearn)
+    features_df, X = engineer_features(state_df)
     
     if features_df.empty or len(features_df) < 3:
         raise ValueError(f"Insufficient data for training: {len(features_df)} districts")
     
-    # Prepare feature matrix
-    feature_cols = ['bio_rate', 'bio_trend', 'bio_volatility', 'deviation', 'enrol_bio_ratio']
-    X = features_df[feature_cols].fillna(0).values
-    
     # Check for sklearn
     if not _ensure_sklearn():
         # Return statistical-based metadata if sklearn unavailable
@@ -177,7 +197,7 @@ def train_demographic_risk_model(state: str = "All") -> Dict:
             "training_date": datetime.now().strftime('%Y-%m-%d'),
             "state": state,
             "districts_trained": len(features_df),
-            "features": feature_cols,
+            "features": FEATURE_COLS,
             "sklearn_available": False
         }
     
@@ -199,12 +219,13 @@ def train_demographic_risk_model(state: str = "All") -> Dict:
     
     # Cache model in memory (for this session)
     cache_key = f"demographic_{state.lower()}"
-    _model_cache[cache_key] = {
-        "model": model,
-        "scaler": scaler,
-        "features": feature_cols,
-        "trained_at": datetime.now()
-    }
+    with _MODEL_CACHE_LOCK:
+        _model_cache[cache_key] = {
+            "model": model,
+            "scaler": scaler,
+            "features": FEATURE_COLS,
+            "trained_at": datetime.now()
+        }
     
     # Save model to disk (optional, for persistence)
     try:
@@ -221,7 +242,7 @@ def train_demographic_risk_model(state: str = "All") -> Dict:
         "training_date": datetime.now().strftime('%Y-%m-%d'),
         "state": state,
         "districts_trained": len(features_df),
-        "features": feature_cols,
+        "features": FEATURE_COLS,
         "sklearn_available": True
     }
     
@@ -230,6 +251,39 @@ def train_demographic_risk_model(state: str = "All") -> Dict:
     return metadata
 
 
+@lru_cache(maxsize=64)
+def _metadata_for_training_time(trained_at: float) -> Dict:
+    return {
+        "demographic_model_name": "IsolationForest_BiometricEngagement",
+        "model_version": "2.0",
+        "training_date": datetime.fromtimestamp(trained_at).strftime('%Y-%m-%d'),
+        "features": FEATURE_COLS
+    }
+
+
+def get_demographic_model_metadata(state: str = "All") -> Dict:
+    """
+    Metadata for a state's demographic model, without loading the model.
+    
+    Keyed on the model file's mtime (which is also its training date), so
+    repeat calls are a stat() + dict hit and a retrain invalidates it.
+    
+    Raises:
+        FileNotFoundError: If no model exists for the state
+    """
+    state_key = state.lower()
+    try:
+        trained_at = (MODEL_DIR / f"demographic_risk_{state_key}.joblib").stat().st_mtime
+    except OSError:
+        # Trained in this process but not persisted (e.g. read-only disk)
+        with _MODEL_CACHE_LOCK:
+            cached = _model_cache.get(f"demographic_{state_key}")
+        if cached is None:
+            raise FileNotFoundError(f"No demographic model found for state: {state}")
+        trained_at = cached["trained_at"].timestamp()
+    return dict(_metadata_for_training_time(trained_at))
+
+
 def load_demographic_risk_model(state: str = "All") -> Tuple[Any, Any, Dict]:
     """
     Load trained demographic risk model.
@@ -246,8 +300,9 @@ def load_demographic_risk_model(state: str = "All") -> Tuple[Any, Any, Dict]:
     cache_key = f"demographic_{state.lower()}"
     
     # Check in-memory cache first
-    if cache_key in _model_cache:
-        cached = _model_cache[cache_key]
+    with _MODEL_CACHE_LOCK:
+        cached = _model_cache.get(cache_key)
+    if cached is not None:
         return cached["model"], cached["scaler"], {
             "demographic_model_name": "IsolationForest_BiometricEngagement",
             "model_version": "2.0",
@@ -269,16 +324,17 @@ def load_demographic_risk_model(state: str = "All") -> Tuple[Any, Any, Dict]:
                 "demographic_model_name": "IsolationForest_BiometricEngagement",
                 "model_version": "2.0",
                 "training_date": datetime.now().strftime('%Y-%m-%d'),
-                "features": ['bio_rate', 'bio_trend', 'bio_volatility', 'deviation', 'enrol_bio_ratio']
+                "features": FEATURE_COLS
             }
             
             # Cache for future use
-            _model_cache[cache_key] = {
-                "model": model,
-                "scaler": scaler,
-                "features": metadata["features"],
-                "trained_at": datetime.now()
-            }
+            with _MODEL_CACHE_LOCK:
+                _model_cache[cache_key] = {
+                    "model": model,
+                    "scaler": scaler,
+                    "features": metadata["features"],
+                    "trained_at": datetime.now()
+                }
             
             return model, scaler, metadata
         except Exception as e:
@@ -287,7 +343,65 @@ def load_demographic_risk_model(state: str = "All") -> Tuple[Any, Any, Dict]:
     raise FileNotFoundError(f"No trained model found for state: {state}")
 
 
-def predict_demographic_risks(state: str, auto_train: bool = True) -> pd.DataFrame:
+def _apply_model_scores(features_df: pd.DataFrame, X: np.ndarray, model, scaler) -> pd.DataFrame:
+    """Score engineered features with a fitted IsolationForest and attach risk columns."""
+    # Scale and predict. sklearn's tree code walks float32 inputs, so cast
+    # once here instead of letting each predict call upcast-copy float64.
+    X_scaled = scaler.transform(X).astype(np.float32, copy=False)
+    anomaly_scores = model.decision_function(X_scaled)
+    anomaly_labels = model.predict(X_scaled)
+    
+    # Convert anomaly scores to risk scores (1-10 scale), in place on one buffer
+    span = np.ptp(anomaly_scores)
+    
+    if span > 0:
+        risk_scores = np.empty_like(anomaly_scores)
+        np.subtract(anomaly_scores, anomaly_scores.min(), out=risk_scores)
+        risk_scores /= span
+        # Invert: lower anomaly score = higher risk
+        risk_scores *= -9.0
+        risk_scores += 10.0  # Scale to 1-10
+    else:
+        risk_scores = np.full(anomaly_scores.shape, 5.0)
+    
+    # Add predictions to features
+    features_df['risk_score'] = risk_scores
+    features_df['is_anomaly'] = (anomaly_labels == -1)
+    features_df['anomaly_score'] = anomaly_scores
+    
+    return features_df
+
+
+def _apply_statistical_scores(features_df: pd.DataFrame) -> pd.DataFrame:
+    """Statistical risk scoring used when sklearn or the model is unavailable."""
+    # Calculate risk scores based on feature analysis
+    risk_scores = []
+    for _, row in features_df.iterrows():
+        # Risk factors:
+        # 1. Low bio_rate = higher risk
+        # 2. Negative bio_trend = higher risk
+        # 3. High volatility = higher risk
+        # 4. Large negative deviation = higher risk
+        # 5. High enrol_bio_ratio = higher risk (more enrolments, fewer bio updates)
+        
+        bio_rate_risk = 10 - min(10, max(0, row['bio_rate'] / 1000))  # Normalize
+        trend_risk = 5 - min(5, max(-5, row['bio_trend'] / 100))  # Slope impact
+        volatility_risk = min(3, row['bio_volatility'] * 3)  # Cap at 3
+        deviation_risk = 2 if row['deviation'] < -20 else (1 if row['deviation'] < 0 else 0)
+        ratio_risk = min(2, row['enrol_bio_ratio'] / 100) if row['enrol_bio_ratio'] > 10 else 0
+        
+        total_risk = bio_rate_risk * 0.3 + trend_risk * 0.25 + volatility_risk * 0.2 + deviation_risk * 0.15 + ratio_risk * 0.1
+        risk_scores.append(min(10, max(1, total_risk + 2)))  # Shift to 2-10 range
+    
+    features_df['risk_score'] = risk_scores
+    features_df['is_anomaly'] = features_df['risk_score'] > 6
+    features_df['anomaly_score'] = -features_df['risk_score']  # Negative for consistency
+    
+    return features_df
+
+
+def predict_demographic_risks(state: str, df: Optional[pd.DataFrame] = None,
+                              auto_train: bool = True) -> pd.DataFrame:
     """
     Predict demographic risks for a state using ML model.
     
@@ -295,38 +409,33 @@ def predict_demographic_risks(state: str, auto_train: bool = True) -> pd.DataFra
     
     Args:
         state: State name to analyze
+        df: Rows for this state if the caller already has them loaded
+            (skips the reload + filter); loaded from the DB when None
         auto_train: If True, train model if not found
         
     Returns:
         DataFrame with district-level risk predictions
     """
-    from backend.ml.data_loader import load_processed_data
-    
-    # Load data from database
-    try:
-        df = load_processed_data(validate=False)
-    except Exception as e:
-        raise ValueError(f"Failed to load data: {e}")
-    
-    if df.empty:
-        raise ValueError("No data available for prediction")
-    
-    # Filter by state
-    state_df = df[df['state'].str.lower() == state.lower()].copy()
+    if df is None:
+        from backend.ml.data_loader import load_state_data
+        
+        # Load this state's rows (precomputed row index, no full-frame filter)
+        try:
+            state_df = load_state_data(state)
+        except Exception as e:
+            raise ValueError(f"Failed to load data: {e}")
+    else:
+        state_df = df
     
     if state_df.empty:
         raise ValueError(f"No data found for state: {state}")
     
-    # Engineer features
-    features_df = engineer_features(state_df)
+    # Engineer features (feature matrix comes back ready for sklearn)
+    features_df, X = engineer_features(state_df)
     
     if features_df.empty:
         raise ValueError(f"No features could be engineered for state: {state}")
     
-    # Prepare feature matrix
-    feature_cols = ['bio_rate', 'bio_trend', 'bio_volatility', 'deviation', 'enrol_bio_ratio']
-    X = features_df[feature_cols].fillna(0).values
-    
     # Check sklearn availability
     sklearn_available = _ensure_sklearn()
     
@@ -343,28 +452,7 @@ def predict_demographic_risks(state: str, auto_train: bool = True) -> pd.DataFra
                 else:
                     raise
             
-            # Scale and predict
-            X_scaled = scaler.transform(X)
-            anomaly_scores = model.decision_function(X_scaled)
-            anomaly_labels = model.predict(X_scaled)
-            
-            # Convert anomaly scores to risk scores (1-10 scale)
-            min_score = anomaly_scores.min()
-            max_score = anomaly_scores.max()
-            
-            if max_score - min_score > 0:
-                normalized = (anomaly_scores - min_score) / (max_score - min_score)
-                # Invert: lower anomaly score = higher risk
-                risk_scores = 10 - (normalized * 9)  # Scale to 1-10
-            else:
-                risk_scores = np.full(len(anomaly_scores), 5.0)
-            
-            # Add predictions to features
-            features_df['risk_score'] = risk_scores
-            features_df['is_anomaly'] = (anomaly_labels == -1)
-            features_df['anomaly_score'] = anomaly_scores
-            
-            return features_df
+            return _apply_model_scores(features_df, X, model, scaler)
             
         except Exception as e:
             logger.warning(f"ML prediction failed, using statistical fallback: {e}")
@@ -372,30 +460,39 @@ def predict_demographic_risks(state: str, auto_train: bool = True) -> pd.DataFra
     # Statistical fallback (no sklearn needed)
     logger.info("Using statistical risk scoring (sklearn unavailable or failed)")
     
-    # Calculate risk scores based on feature analysis
-    risk_scores = []
-    for _, row in features_df.iterrows():
-        # Risk factors:
-        # 1. Low bio_rate = higher risk
-        # 2. Negative bio_trend = higher risk
-        # 3. High volatility = higher risk
-        # 4. Large negative deviation = higher risk
-        # 5. High enrol_bio_ratio = higher risk (more enrolments, fewer bio updates)
-        
-        bio_rate_risk = 10 - min(10, max(0, row['bio_rate'] / 1000))  # Normalize
-        trend_risk = 5 - min(5, max(-5, row['bio_trend'] / 100))  # Slope impact
-        volatility_risk = min(3, row['bio_volatility'] * 3)  # Cap at 3
-        deviation_risk = 2 if row['deviation'] < -20 else (1 if row['deviation'] < 0 else 0)
-        ratio_risk = min(2, row['enrol_bio_ratio'] / 100) if row['enrol_bio_ratio'] > 10 else 0
-        
-        total_risk = bio_rate_risk * 0.3 + trend_risk * 0.25 + volatility_risk * 0.2 + deviation_risk * 0.15 + ratio_risk * 0.1
-        risk_scores.append(min(10, max(1, total_risk + 2)))  # Shift to 2-10 range
+    return _apply_statistical_scores(features_df)
+
+
+def warm_model_cache():
+    """
+    Pre-load every persisted demographic model into _model_cache.
     
-    features_df['risk_score'] = risk_scores
-    features_df['is_anomaly'] = features_df['risk_score'] > 6
-    features_df['anomaly_score'] = -features_df['risk_score']  # Negative for consistency
+    Started in a daemon thread from the app's startup so the first API
+    request does not pay the joblib read.
+    """
+    try:
+        import joblib
+    except ImportError:
+        return
     
-    return features_df
+    for model_path in MODEL_DIR.glob("demographic_risk_*.joblib"):
+        state_key = model_path.stem.replace("demographic_risk_", "", 1)
+        scaler_path = MODEL_DIR / f"demographic_scaler_{state_key}.joblib"
+        try:
+            model = joblib.load(model_path)
+            scaler = joblib.load(scaler_path)
+        except Exception as e:
+            logger.debug(f"Skipping cache warm-up for {state_key}: {e}")
+            continue
+        
+        # Never clobber a model trained/loaded while we were warming up
+        with _MODEL_CACHE_LOCK:
+            _model_cache.setdefault(f"demographic_{state_key}", {
+                "model": model,
+                "scaler": scaler,
+                "features": FEATURE_COLS,
+                "trained_at": datetime.now()
+            })
 
 
 if __name__ == "__main__":
@@ -5,9 +5,31 @@ UPDATED: Now uses monthly CSV data exclusively via data_loader.
 import numpy as np
 import pandas as pd
 
-from backend.ml.registry import load_model
+import joblib
+
+from backend.ml.registry import MODEL_DIR
 from backend.ml.data_loader import get_monthly_enrolment_series
 from backend.common.state_resolver import resolve_state
+from backend.common.key_utils import slugify_key
+
+_BASELINE_PREFIX = "baseline_expected_"
+
+# {state suffix: path} for every baseline model on disk, keyed on MODEL_DIR's mtime
+# so models trained after import (e.g. via /ml/train/baseline) are picked up.
+_MODEL_INDEX = {"mtime": None, "paths": {}}
+
+
+def _baseline_model_path(state: str, state_key: str):
+    """Resolve the baseline model file with one dict lookup instead of probing disk 3x."""
+    mtime = MODEL_DIR.stat().st_mtime
+    if _MODEL_INDEX["mtime"] != mtime:
+        _MODEL_INDEX["paths"] = {
+            p.stem[len(_BASELINE_PREFIX):]: p
+            for p in MODEL_DIR.glob(f"{_BASELINE_PREFIX}*.joblib")
+        }
+        _MODEL_INDEX["mtime"] = mtime
+    paths = _MODEL_INDEX["paths"]
+    return paths.get(state_key) or paths.get(state) or paths.get("global")
 
 
 def _build_monthly_features(df: pd.DataFrame) -> pd.DataFrame:
@@ -15,28 +37,17 @@ def _build_monthly_features(df: pd.DataFrame) -> pd.DataFrame:
     Build features for monthly data.
     Adapted for monthly granularity instead of daily.
     """
-    df = df.copy()
-    
-    # Convert month to datetime if not already
-    if not pd.api.types.is_datetime64_any_dtype(df['month']):
-        df['month'] = pd.to_datetime(df['month'])
-    
-    # Extract temporal features
-    df["month_num"] = df["month"].dt.month
-    df["year"] = df["month"].dt.year
-    
-    # Create lag features (previous months)
-    df["lag_1"] = df["total_enrolment"].shift(1)
-    df["lag_2"] = df["total_enrolment"].shift(2)
-    
-    # Rolling mean (3-month window)
-    df["roll_3"] = df["total_enrolment"].rolling(3, min_periods=1).mean()
-    
-    # Fill NaN values for first rows
-    df["lag_1"] = df["lag_1"].fillna(df["total_enrolment"])
-    df["lag_2"] = df["lag_2"].fillna(df["total_enrolment"])
-    
-    return df
+    # assign() builds the derived frame in one go instead of copy() + 6 setitems
+    total = df["total_enrolment"]
+    return df.assign(
+        month_num=df["month"].dt.month,
+        year=df["month"].dt.year,
+        # Lag features (previous months), first rows filled with the current value
+        lag_1=total.shift(1).fillna(total),
+        lag_2=total.shift(2).fillna(total),
+        # Rolling mean (3-month window)
+        roll_3=total.rolling(3, min_periods=1).mean(),
+    )
 
 
 def compute_district_risk(state: str, district: str) -> dict:
@@ -65,14 +76,14 @@ def compute_district_risk(state: str, district: str) -> dict:
             "district": district
         }
     
-    # Convert to DataFrame
-    df = pd.DataFrame(series)
+    # Convert to DataFrame (data_loader already hands back datetime months)
+    df = pd.DataFrame.from_records(series)
     if df.empty:
         return {"status": "skipped", "message": "Empty data"}
     
-    # Ensure month column is datetime
-    df = df.rename(columns={"month": "month"})
-    df["month"] = pd.to_datetime(df["month"], errors="coerce")
+    # Only parse if a caller handed back non-datetime months (no-op otherwise)
+    if not pd.api.types.is_datetime64_any_dtype(df["month"]):
+        df["month"] = pd.to_datetime(df["month"], errors="coerce")
     df = df.dropna(subset=["month"]).sort_values("month")
     
     # Build features for monthly data
@@ -84,15 +95,10 @@ def compute_district_risk(state: str, district: str) -> dict:
             "message": "Insufficient data after feature engineering"
         }
     
-    # Load baseline model (try state-specific, then global)
-    from backend.common.key_utils import slugify_key
+    # Load baseline model (state-specific, then global)
     state_key = slugify_key(state)
-    
-    baseline = load_model(f"baseline_expected_{state_key}")
-    if baseline is None:
-        baseline = load_model(f"baseline_expected_{state}")
-    if baseline is None:
-        baseline = load_model("baseline_expected_global")
+    model_path = _baseline_model_path(state, state_key)
+    baseline = joblib.load(model_path) if model_path is not None else None
     
     if baseline is None:
         return {
@@ -6,6 +6,111 @@ import numpy as np
 import pandas as pd
 from typing import List, Dict, Tuple
 
+# Optional: numba-compiled segment stats kernel; NumPy otherwise
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Percentile ladder: (<=p25) 1-3, (<=p50) 3-5, (<=p75) 5-7, (<=p90) 7-9, (>p90) 9-10.
+# Per bucket: base score, width, and the midpoint used when the bucket is empty
+# (equal percentiles).
+_BUCKET_BASE = np.array([1.0, 3.0, 5.0, 7.0, 9.0])
+_BUCKET_WIDTH = np.array([2.0, 2.0, 2.0, 2.0, 1.0])
+_BUCKET_FALLBACK = np.array([2.0, 4.0, 6.0, 8.0, 9.5])
+
+# Severity: score < 4 Low, 4 <= score < 7 Moderate, >= 7 Severe
+_SEVERITY_EDGES = np.array([4.0, 7.0])
+_SEVERITY_LABELS = np.array(["Low", "Moderate", "Severe"])
+
+
+def percentile_risk_scores(raw_risks: np.ndarray) -> np.ndarray:
+    """
+    Vectorized percentile ladder: raw risks -> 1-10 scores in one pass.
+    
+    np.searchsorted(side='left') picks each value's bucket with the edges
+    inclusive on the right (same as the old `<=` if/elif chain), then each
+    score is interpolated within its bucket. Degenerate buckets fall back to
+    their midpoint exactly like the scalar version did.
+    """
+    raw = np.asarray(raw_risks, dtype=float)
+    p25, p50, p75, p90 = np.percentile(raw, [25, 50, 75, 90])
+    
+    bucket = np.searchsorted([p25, p50, p75, p90], raw, side='left')
+    lo = np.array([0.0, p25, p50, p75, p90])[bucket]
+    hi = np.array([p25, p50, p75, p90, raw.max()])[bucket]
+    span = hi - lo
+    frac = np.divide(raw - lo, span, out=np.zeros_like(span), where=span > 0)
+    return np.where(span > 0,
+                    _BUCKET_BASE[bucket] + frac * _BUCKET_WIDTH[bucket],
+                    _BUCKET_FALLBACK[bucket])
+
+
+def severity_levels(scores: np.ndarray) -> np.ndarray:
+    """Severity label per score: >=7 Severe, >=4 Moderate, else Low."""
+    # side='right' puts scores equal to an edge in the upper bucket
+    return _SEVERITY_LABELS[np.searchsorted(_SEVERITY_EDGES, scores, side='right')]
+
+
+def _segment_gap_stats_numpy(values: np.ndarray, offsets: np.ndarray):
+    counts = np.diff(offsets)
+    starts = offsets[:-1]
+    means = np.add.reduceat(values, starts) / counts
+    dev = values - np.repeat(means, counts)
+    std = np.sqrt(np.add.reduceat(dev * dev, starts) / counts)
+    neg_ratio = np.add.reduceat((dev < 0).astype(np.float64), starts) / counts
+    trend = (values[offsets[1:] - 1] - values[starts]) / counts
+    return std, neg_ratio, trend
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _segment_gap_stats_numba(values, offsets):
+        n = len(offsets) - 1
+        std = np.empty(n)
+        neg_ratio = np.empty(n)
+        trend = np.empty(n)
+        for i in range(n):
+            a, b = offsets[i], offsets[i + 1]
+            count = b - a
+            total = 0.0
+            for j in range(a, b):
+                total += values[j]
+            mean = total / count
+            sq = 0.0
+            below = 0
+            for j in range(a, b):
+                d = values[j] - mean
+                sq += d * d
+                if d < 0:
+                    below += 1
+            std[i] = np.sqrt(sq / count)
+            neg_ratio[i] = below / count
+            trend[i] = (values[b - 1] - values[a]) / count
+        return std, neg_ratio, trend
+
+
+def segment_gap_stats(values: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-segment gap metrics over a concatenated series (e.g. one district per
+    segment, rows sorted by month). Segment i is values[offsets[i]:offsets[i+1]]
+    and must be non-empty.
+    
+    Returns:
+        (population std, share of points below the segment mean,
+         (last - first) / count) - one entry per segment
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+    if len(offsets) < 2:
+        empty = np.empty(0)
+        return empty, empty, empty
+    if NUMBA_AVAILABLE:
+        return _segment_gap_stats_numba(values, offsets)
+    return _segment_gap_stats_numpy(values, offsets)
+
 
 def normalize_risk_scores_percentile(raw_risks: List[float]) -> List[Tuple[float, str]]:
     """
@@ -17,39 +122,23 @@ def normalize_risk_scores_percentile(raw_risks: List[float]) -> List[Tuple[float
     Returns:
         List of tuples (normalized_score, severity_level)
     """
-    raw_risks_array = np.array(raw_risks)
-    
-    # Calculate percentiles
-    p25 = np.percentile(raw_risks_array, 25)
-    p50 = np.percentile(raw_risks_array, 50)
-    p75 = np.percentile(raw_risks_array, 75)
-    p90 = np.percentile(raw_risks_array, 90)
-    
-    normalized = []
-    for raw_risk in raw_risks:
-        # Map percentiles to risk scores (1-10 scale)
-        if raw_risk <= p25:
-            score = 1.0 + (raw_risk / p25) * 2.0 if p25 > 0 else 2.0
-        elif raw_risk <= p50:
-            score = 3.0 + ((raw_risk - p25) / (p50 - p25)) * 2.0 if p50 > p25 else 4.0
-        elif raw_risk <= p75:
-            score = 5.0 + ((raw_risk - p50) / (p75 - p50)) * 2.0 if p75 > p50 else 6.0
-        elif raw_risk <= p90:
-            score = 7.0 + ((raw_risk - p75) / (p90 - p75)) * 2.0 if p90 > p75 else 8.0
-        else:
-            score = 9.0 + min(1.0, (raw_risk - p90) / (max(raw_risks) - p90)) if max(raw_risks) > p90 else 9.5
-        
-        # Determine severity
-        if score >= 7.0:
-            severity = "Severe"
-        elif score >= 4.0:
-            severity = "Moderate"
-        else:
-            severity = "Low"
-        
-        normalized.append((round(score, 2), severity))
-    
-    return normalized
+    scores = percentile_risk_scores(raw_risks)
+    return list(zip(np.round(scores, 2).tolist(), severity_levels(scores).tolist()))
+
+
+def expand_trend_values(values, target_length: int = 30) -> np.ndarray:
+    """
+    Last `target_length` monthly values, or if there are fewer, each month's
+    value repeated proportionally to fill exactly `target_length` points (the
+    first `target_length % n` months get one extra day). Keeps the input dtype.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    if n >= target_length or n == 0:
+        return values[-target_length:]
+    counts = np.full(n, target_length // n)
+    counts[:target_length % n] += 1
+    return np.repeat(values, counts)
 
 
 def calculate_trend_data(values: np.ndarray, target_length: int = 30) -> List[float]:
@@ -63,22 +152,7 @@ def calculate_trend_data(values: np.ndarray, target_length: int = 30) -> List[fl
     Returns:
         List of float values padded/truncated to target length
     """
-    trend_data = values.tolist()
-    
-    if len(trend_data) > target_length:
-        # Take last N values
-        trend_data = trend_data[-target_length:]
-    elif len(trend_data) < target_length:
-        # Pad by repeating values proportionally
-        days_per_month = target_length // len(trend_data)
-        remainder = target_length % len(trend_data)
-        daily_trend = []
-        for i, monthly_val in enumerate(trend_data):
-            days_for_this_month = days_per_month + (1 if i < remainder else 0)
-            daily_trend.extend([monthly_val] * days_for_this_month)
-        trend_data = daily_trend[:target_length]
-    
-    return [float(x) for x in trend_data]
+    return expand_trend_values(values, target_length).astype(float).tolist()
 
 
 def calculate_state_trend(df: pd.DataFrame, column: str = 'total_enrolments') -> str:
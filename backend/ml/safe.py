@@ -1,12 +1,28 @@
-import traceback
+from collections import deque
 
-def safe_run(fn, *args, **kwargs):
+MAX_TRACE_FRAMES = 15
+
+
+def _trace_frames(exc: BaseException, limit: int = MAX_TRACE_FRAMES):
+    """Innermost `limit` frames as "file:line", read straight off __traceback__
+    (skips the StackSummary formatting that traceback.format_exc does)."""
+    frames = deque(maxlen=limit)
+    tb = exc.__traceback__
+    while tb is not None:
+        frames.append(f"{tb.tb_frame.f_code.co_filename}:{tb.tb_lineno}")
+        tb = tb.tb_next
+    return list(frames)
+
+
+def safe_run(fn, *args, _capture_trace: bool = True, **kwargs):
     try:
         return fn(*args, **kwargs)
     except Exception as e:
-        return {
+        result = {
             "status": "error",
             "error_type": type(e).__name__,
             "message": str(e),
-            "trace": traceback.format_exc().splitlines()[-15:]
         }
+        if _capture_trace:
+            result["trace"] = _trace_frames(e)
+        return result
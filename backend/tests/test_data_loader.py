@@ -0,0 +1,76 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sqlalchemy")
+
+from backend.ml import data_loader
+from backend.ml.data_loader import load_state_data, list_districts
+
+
+def _wide_frame():
+    """A small frame shaped like the one _load_frame caches."""
+    rows = [
+        ("West Bengal", "Kolkata", "2025-01-01", 10, 1, 5),
+        ("Tamil Nadu", "Madurai", "2025-02-01", 7, 2, 3),
+        ("Tamil Nadu", "Chennai", "2025-01-01", 20, 4, 8),
+        ("Tamil Nadu", "Chennai", "2025-02-01", 22, 5, 9),
+        ("West Bengal", "Howrah", "2025-01-01", 6, 0, 2),
+        ("Tamil Nadu", "Madurai", "2025-01-01", 8, 1, 4),
+    ]
+    df = pd.DataFrame(rows, columns=data_loader._EMPTY_COLUMNS)
+    df["month"] = pd.to_datetime(df["month"])
+    df = df.astype({col: "int32" for col in data_loader._METRIC_COLUMNS})
+    df["state"] = df["state"].astype("category")
+    df["state_lc"] = df["state"].str.lower().astype("category")
+    return df.sort_values(["state_lc", "district", "month"], kind="stable", ignore_index=True)
+
+
+@pytest.fixture
+def cached_frame(monkeypatch):
+    # monkeypatch restores the module cache afterwards
+    monkeypatch.setitem(data_loader._DB_CACHE, "loaded", None)
+    monkeypatch.setitem(data_loader._DB_CACHE, "checked_at", None)
+    df = _wide_frame()
+    data_loader._store_in_cache(df, fingerprint=None)
+    return df
+
+
+def test_load_state_data_matches_filter(cached_frame):
+    expected = cached_frame[cached_frame["state_lc"] == "tamil nadu"]
+
+    result = load_state_data("Tamil Nadu")
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert result["district"].tolist() == ["Chennai", "Chennai", "Madurai", "Madurai"]
+
+
+def test_load_state_data_is_case_insensitive(cached_frame):
+    pd.testing.assert_frame_equal(load_state_data("TAMIL NADU"), load_state_data("tamil nadu"))
+
+
+def test_load_state_data_unknown_state_is_empty(cached_frame):
+    result = load_state_data("Atlantis")
+    assert result.empty
+    assert list(result.columns) == list(cached_frame.columns)
+
+
+def test_load_state_data_returns_a_copy(cached_frame):
+    result = load_state_data("West Bengal")
+    result["total_enrolments"] = 0
+
+    cached = data_loader._DB_CACHE["loaded"].data
+    assert cached.loc[cached["state_lc"] == "west bengal", "total_enrolments"].tolist() == [6, 10]
+
+
+def test_load_state_data_without_data(monkeypatch):
+    monkeypatch.setattr(data_loader, "_load_frame", lambda force_reload=False: None)
+
+    result = load_state_data("Tamil Nadu")
+
+    assert result.empty
+    assert list(result.columns) == data_loader._EMPTY_COLUMNS
+
+
+def test_list_districts_uses_the_same_load(cached_frame):
+    assert list_districts("tamil nadu") == ["Chennai", "Madurai"]
+    assert list_districts("Atlantis") == []
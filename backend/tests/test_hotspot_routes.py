@@ -0,0 +1,67 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")  # TestClient
+ml = pytest.importorskip("backend.api.ml")
+export = pytest.importorskip("backend.api.export")
+ai_insights = pytest.importorskip("backend.api.ai_insights")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+HOTSPOTS = {
+    "status": "success",
+    "state": "Tamil Nadu",
+    "count": 2,
+    "avg_risk_score": 7.5,
+    "severe_count": 1,
+    "worst_district": "Chennai",
+    "trend": "Worsening",
+    "hotspots": [
+        {"district": "Chennai", "score": 9.1, "severity": "Severe",
+         "bio_gap_abs_mean_30": 120.0, "bio_negative_gap_ratio_30": 40.0,
+         "compare_to_avg": 1.6, "trend_data": np.linspace(1.0, 2.0, 30)},
+        {"district": "Madurai", "score": 5.9, "severity": "Moderate",
+         "bio_gap_abs_mean_30": 60.0, "bio_negative_gap_ratio_30": 20.0,
+         "compare_to_avg": -1.6, "trend_data": np.linspace(2.0, 1.0, 30)},
+    ],
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The export / insights routes import biometric_hotspots_data from backend.api.ml
+    monkeypatch.setattr(ml, "biometric_hotspots_data", lambda state: HOTSPOTS)
+    for module in (ml, export, ai_insights):
+        monkeypatch.setattr(module, "resolve_state", lambda state: "Tamil Nadu")
+    app = FastAPI()
+    app.include_router(ml.router, prefix="/ml")
+    app.include_router(export.router, prefix="/export")
+    app.include_router(ai_insights.router, prefix="/ai")
+    return TestClient(app)
+
+
+def test_biometric_hotspots_route_serializes_trend_arrays(client):
+    body = client.get("/ml/biometric/hotspots", params={"state": "tn"}).json()
+
+    assert body["worst_district"] == "Chennai"
+    assert body["hotspots"][0]["trend_data"] == np.linspace(1.0, 2.0, 30).tolist()
+
+
+def test_export_biometric_hotspots_csv(client):
+    resp = client.get("/export/csv/biometric-hotspots", params={"state": "tn"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    lines = resp.text.strip().splitlines()
+    assert lines[0].startswith("District,Risk Score,Severity")
+    assert [line.split(",")[0] for line in lines[1:]] == ["Chennai", "Madurai"]
+
+
+def test_biometric_insights(client):
+    body = client.get("/ai/insights/biometric-hotspots", params={"state": "tn"}).json()
+
+    assert body["status"] == "success"
+    assert body["insights"]["actions"][0] == "Urgent: Deploy biometric equipment maintenance teams"
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")  # TestClient
+ml = pytest.importorskip("backend.api.ml")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(ml, "resolve_state", lambda state: "Tamil Nadu")
+    app = FastAPI()
+    app.include_router(ml.router, prefix="/ml")
+    return TestClient(app)
+
+
+def _gap_frame(n: int) -> pd.DataFrame:
+    """Rows shaped like gap_anomaly_frame's output."""
+    months = pd.date_range("2020-01-01", periods=n, freq="MS")
+    total = np.arange(n, dtype=np.int64) * 10
+    expected = total + 2.5
+    return pd.DataFrame({
+        "date": months.date.astype(str),
+        "total_enrolment": total,
+        "expected": expected,
+        "gap": total - expected,
+        "anomaly_flag": np.where(np.arange(n) % 7 == 0, -1, 1),
+        "anomaly_score": np.linspace(-0.2, 0.3, n),
+    })
+
+
+@pytest.mark.parametrize("rows", [1, 3, 2501])  # 2501: several 1000-row batches
+def test_gap_anomaly_streams_the_whole_document(client, monkeypatch, rows):
+    frame = _gap_frame(rows)
+    monkeypatch.setattr(ml, "gap_anomaly_frame", lambda state: frame)
+
+    resp = client.get("/ml/anomaly/gap", params={"state": "tn"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/json")
+    assert json.loads(resp.content) == {
+        "status": "success",
+        "state": "Tamil Nadu",
+        "data_source": "processed_monthly_csv",
+        "results": frame.to_dict(orient="records"),
+    }
+
+
+def test_gap_anomaly_error_dict_is_returned_as_is(client, monkeypatch):
+    error = {"status": "error", "message": "Not enough monthly data for state=Tamil Nadu. Need >=4 months."}
+    monkeypatch.setattr(ml, "gap_anomaly_frame", lambda state: error)
+
+    resp = client.get("/ml/anomaly/gap", params={"state": "tn"})
+
+    assert resp.status_code == 200
+    assert resp.json() == error
+
+
+def test_gap_anomaly_exception_becomes_error_dict(client, monkeypatch):
+    def boom(state):
+        raise RuntimeError("model store unavailable")
+    monkeypatch.setattr(ml, "gap_anomaly_frame", boom)
+
+    body = client.get("/ml/anomaly/gap", params={"state": "tn"}).json()
+
+    assert body["status"] == "error"
+    assert body["error_type"] == "RuntimeError"
+    assert body["message"] == "model store unavailable"
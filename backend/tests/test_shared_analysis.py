@@ -0,0 +1,71 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+from backend.ml.risk.shared_analysis import (
+    normalize_risk_scores_percentile,
+    percentile_risk_scores,
+    severity_levels,
+)
+
+
+def _scalar_ladder(raw_risks):
+    """The original per-value if/elif ladder (unrounded score, severity)."""
+    p25, p50, p75, p90 = (np.percentile(raw_risks, q) for q in (25, 50, 75, 90))
+    top = max(raw_risks)
+    out = []
+    for raw in raw_risks:
+        if raw <= p25:
+            score = 1.0 + (raw / p25) * 2.0 if p25 > 0 else 2.0
+        elif raw <= p50:
+            score = 3.0 + ((raw - p25) / (p50 - p25)) * 2.0 if p50 > p25 else 4.0
+        elif raw <= p75:
+            score = 5.0 + ((raw - p50) / (p75 - p50)) * 2.0 if p75 > p50 else 6.0
+        elif raw <= p90:
+            score = 7.0 + ((raw - p75) / (p90 - p75)) * 2.0 if p90 > p75 else 8.0
+        else:
+            score = 9.0 + min(1.0, (raw - p90) / (top - p90)) if top > p90 else 9.5
+
+        if score >= 7.0:
+            severity = "Severe"
+        elif score >= 4.0:
+            severity = "Moderate"
+        else:
+            severity = "Low"
+        out.append((score, severity))
+    return out
+
+
+RISK_SAMPLES = [
+    np.random.default_rng(0).gamma(2.0, 3.0, size=40).tolist(),
+    np.random.default_rng(1).uniform(0, 100, size=7).tolist(),
+    [0.0, 0.0, 0.0, 0.0, 5.0, 5.0, 5.0, 10.0],   # tied percentiles
+    [3.0] * 12,                                  # every bucket degenerate
+    [0.0] * 5,
+    [1.0, 2.0],
+    [42.0],
+]
+
+
+@pytest.mark.parametrize("raw", RISK_SAMPLES)
+def test_percentile_risk_scores_match_scalar_ladder(raw):
+    expected = _scalar_ladder(raw)
+
+    scores = percentile_risk_scores(np.array(raw))
+
+    np.testing.assert_allclose(scores, [s for s, _ in expected], rtol=0, atol=1e-9)
+    assert severity_levels(scores).tolist() == [sev for _, sev in expected]
+
+
+@pytest.mark.parametrize("raw", RISK_SAMPLES)
+def test_normalize_risk_scores_percentile_rounds_like_before(raw):
+    # np.round and round() may split a .xx5 tie differently: allow one cent
+    expected = [(pytest.approx(round(s, 2), abs=0.01), sev) for s, sev in _scalar_ladder(raw)]
+    assert normalize_risk_scores_percentile(raw) == expected
+
+
+def test_severity_edges_go_to_upper_bucket():
+    assert severity_levels(np.array([3.99, 4.0, 6.99, 7.0])).tolist() == [
+        "Low", "Moderate", "Moderate", "Severe"
+    ]
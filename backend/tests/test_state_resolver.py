@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from backend.common import state_resolver
+from backend.common.state_resolver import resolve_state, search_states
+
+# Stands in for the state_dim read (sorted, as _canonical_states_cached returns it)
+DB_STATES = (
+    "Himachal Pradesh", "Madhya Pradesh", "Maharashtra", "Manipur",
+    "Tamil Nadu", "West Bengal",
+)
+
+
+@pytest.fixture(autouse=True)
+def db_states(monkeypatch):
+    state_resolver.refresh_state_cache()
+    monkeypatch.setattr(state_resolver, "_canonical_states_cached", lambda epoch: DB_STATES)
+    yield
+    state_resolver._state_index.cache_clear()
+    state_resolver._resolve_state_cached.cache_clear()
+
+
+def test_exact_match_is_case_insensitive():
+    assert resolve_state("tamil nadu") == "Tamil Nadu"
+    assert resolve_state("  WEST   BENGAL ") == "West Bengal"
+
+
+def test_abbreviation():
+    assert resolve_state("TN") == "Tamil Nadu"
+
+
+def test_unique_prefix():
+    assert resolve_state("Tam") == "Tamil Nadu"
+    assert resolve_state("mani") == "Manipur"
+
+
+def test_ambiguous_prefix_falls_through_to_substring():
+    # "ma" starts Madhya Pradesh, Maharashtra and Manipur: no prefix guess,
+    # the substring scan picks the first name containing it
+    assert resolve_state("Ma") == "Himachal Pradesh"
+
+
+def test_substring_match():
+    assert resolve_state("Nadu") == "Tamil Nadu"
+    assert resolve_state("bengal") == "West Bengal"
+
+
+def test_unknown_state_returns_normalized_name():
+    assert resolve_state("atlantis") == "Atlantis"
+
+
+def test_empty_input_raises():
+    with pytest.raises(ValueError):
+        resolve_state("")
+
+
+def test_search_states():
+    assert search_states("ma") == ["Madhya Pradesh", "Maharashtra", "Manipur"]
+    assert search_states(" Tamil  n") == ["Tamil Nadu"]
+    assert search_states("xyz") == []
@@ -1,19 +1,24 @@
 # Schema detection module
+AGGREGATED_TOTAL_COLUMNS = frozenset({"total_enrolments", "total_demo_updates", "total_bio_updates"})
+
+
 def detect_dataset_type(df):
-    cols = set(df.columns)
-    
+    cols = df.columns
+
     # Check for aggregated monthly format (aadhaar_master_monthly.csv)
-    if "total_enrolments" in cols or "total_demo_updates" in cols or "total_bio_updates" in cols:
+    if not AGGREGATED_TOTAL_COLUMNS.isdisjoint(cols):
         return "AGGREGATED_MONTHLY"
 
-    if any(c.startswith("age_") for c in cols):
+    # Single pass over the columns: collect prefixes once, then O(1) lookups
+    prefixes = {c.split("_", 1)[0] + "_" for c in cols if "_" in c}
+
+    if "age_" in prefixes:
         return "ENROLMENT"
 
-    if any(c.startswith("demo_") for c in cols):
+    if "demo_" in prefixes:
         return "DEMOGRAPHIC"
 
-    if any(c.startswith("bio_") for c in cols):
+    if "bio_" in prefixes:
         return "BIOMETRIC"
 
     raise ValueError("Unknown UIDAI dataset schema")
-